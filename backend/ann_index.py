@@ -0,0 +1,201 @@
+# backend/ann_index.py
+import math
+import os
+
+import faiss
+import numpy as np
+
+# flat = exact brute force; the others trade a little recall for sub-linear search
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+
+# Build-time parameters (0 = pick from corpus size)
+IVF_NLIST = int(os.getenv("FAISS_NLIST", "0"))
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+PQ_M = int(os.getenv("FAISS_PQ_M", "16"))  # sub-quantizers; must divide the embedding dim
+PQ_NBITS = 8
+
+# How vectors are stored in flat/IVF/HNSW indexes: float32 (exact), fp16 (2x
+# smaller) or int8 (4x smaller, scalar-quantized per dimension)
+STORAGE = os.getenv("FAISS_STORAGE", "float32")
+STORAGE_CODECS = {"float32": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+
+# Query-time knobs, persisted with each generation; env vars override at load
+NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+# Lossy indexes fetch RERANK * k candidates and re-score them with exact float32
+# vectors from the embedding cache (0 disables re-ranking)
+RERANK = int(os.getenv("FAISS_RERANK", "4"))
+
+# Map index files instead of reading them into each process, so uvicorn
+# workers serving the same generation share its pages through the OS page cache
+FAISS_MMAP = os.getenv("FAISS_MMAP", "1") == "1"
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Below this many vectors exact search is already ~1 ms, so ANN types fall back to flat
+MIN_ANN_VECTORS = int(os.getenv("FAISS_MIN_ANN_VECTORS", "10000"))
+
+# Index types whose vectors can be removed in place (HNSW graphs cannot)
+_REMOVABLE = ("flat", "ivf_flat", "ivf_pq")
+
+# k-means wants roughly this many training points per centroid
+_POINTS_PER_CENTROID = 39
+
+
+def default_nlist(n: int) -> int:
+    """Usual IVF sizing: about 4*sqrt(n) lists, capped so each list gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(n)), n // _POINTS_PER_CENTROID))
+
+
+def min_vectors(index_type: str) -> int:
+    """Smallest corpus the type is built for: enough to train it and worth leaving flat for."""
+    if index_type == "flat":
+        return 0
+    needed = MIN_ANN_VECTORS
+    if index_type in ("ivf_flat", "ivf_pq"):
+        needed = max(needed, IVF_NLIST * _POINTS_PER_CENTROID)
+    if index_type == "ivf_pq":
+        needed = max(needed, 2 ** PQ_NBITS)
+    return needed
+
+
+def index_params(n: int, dim: int, index_type: str = None, storage: str = None) -> dict:
+    """
+    Resolve the configured index type into a concrete parameter set for a
+    corpus of n vectors. Falls back to flat when there are too few vectors to
+    train the requested type, and records both so the fallback is visible.
+    """
+    requested = index_type or INDEX_TYPE
+    storage = storage or STORAGE
+    if requested not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS_INDEX_TYPE {requested!r}, expected one of {INDEX_TYPES}")
+    if storage not in STORAGE_CODECS:
+        raise ValueError(f"Unknown FAISS_STORAGE {storage!r}, expected one of {tuple(STORAGE_CODECS)}")
+
+    resolved = requested
+    if n < min_vectors(requested):
+        resolved = "flat"
+    if resolved == "ivf_pq" and dim % PQ_M:
+        raise ValueError(f"FAISS_PQ_M={PQ_M} must divide the embedding dimension {dim}")
+
+    codec = STORAGE_CODECS[storage]
+    params = {"index_type": resolved, "requested_type": requested, "dim": dim, "storage": storage, "trained_on": 0}
+    if resolved == "flat":
+        params["factory"] = f"IDMap2,{codec}"
+    elif resolved == "hnsw":
+        graph = f"HNSW{HNSW_M},Flat" if storage == "float32" else f"HNSW{HNSW_M}_{codec}"
+        params.update(factory=f"IDMap2,{graph}", hnsw_m=HNSW_M,
+                      ef_construction=HNSW_EF_CONSTRUCTION, efSearch=EF_SEARCH)
+    else:
+        nlist = IVF_NLIST or default_nlist(n)
+        if resolved == "ivf_pq":
+            codec = f"PQ{PQ_M}x{PQ_NBITS}"
+            params.update(storage="pq", pq_m=PQ_M, pq_nbits=PQ_NBITS)
+        # IVF indexes store the 64-bit chunk IDs themselves, no IDMap needed
+        params.update(factory=f"IVF{nlist},{codec}", nlist=nlist, nprobe=min(NPROBE, nlist))
+    if params["storage"] != "float32":
+        params["rerank"] = RERANK
+    return params
+
+
+def read_index(path: str, params: dict = None, mmap: bool = FAISS_MMAP):
+    """
+    Load an index file, memory-mapped if `mmap`. IVF inverted lists are
+    mapped with IO_FLAG_MMAP alone (the on-disk lists hook can't read through
+    a mapped reader); flat/SQ codes need IO_FLAG_MMAP_IFC (FAISS 1.10+) and
+    are read into memory on older versions. HNSW graphs and ID maps are
+    always read into memory. Mapped indexes are read-only.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    if (params or {}).get("index_type", "flat") not in ("ivf_flat", "ivf_pq"):
+        flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return faiss.read_index(path, flags)
+
+
+def supports_remove(params: dict) -> bool:
+    return params.get("index_type", "flat") in _REMOVABLE
+
+
+def empty_index(params: dict):
+    index = faiss.index_factory(params["dim"], params["factory"])
+    if params["index_type"] == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efConstruction = params["ef_construction"]
+    return index
+
+
+def build_index(embeddings, ids, params: dict):
+    """Create, train (if the type needs it) and fill an index; records the training size in params."""
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    index = empty_index(params)
+    if not index.is_trained:
+        index.train(embeddings)
+        params["trained_on"] = len(embeddings)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    apply_search_params(index, params)
+    return index
+
+
+def search_params(params: dict) -> dict:
+    """Query-time knobs for this index, with FAISS_NPROBE / FAISS_EF_SEARCH taking precedence."""
+    knobs = {}
+    if "nprobe" in params:
+        nprobe = int(os.getenv("FAISS_NPROBE", params["nprobe"]))
+        knobs["nprobe"] = min(nprobe, params["nlist"])
+    if "efSearch" in params:
+        knobs["efSearch"] = int(os.getenv("FAISS_EF_SEARCH", params["efSearch"]))
+    return knobs
+
+
+def apply_search_params(index, params: dict):
+    space = faiss.ParameterSpace()
+    for name, value in search_params(params).items():
+        space.set_index_parameter(index, name, value)
+
+
+def filtered_search_params(params: dict, selector):
+    """
+    Per-query SearchParameters restricting a search to `selector`. The type
+    must match the index and carries the index's own nprobe/efSearch, since
+    FAISS takes those from the parameters object instead of the index.
+    """
+    knobs = search_params(params)
+    index_type = params.get("index_type", "flat")
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=knobs["efSearch"])
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=knobs["nprobe"])
+    return faiss.SearchParameters(sel=selector)
+
+
+def rerank_factor(params: dict) -> int:
+    """Candidate multiplier for exact re-ranking; 0 for exact indexes or when disabled."""
+    if "rerank" not in params:
+        return 0
+    return max(0, int(os.getenv("FAISS_RERANK", params["rerank"])))
+
+
+def rerank(query_vecs, distances, ids, exact_vectors, k: int):
+    """
+    Re-score approximate candidates with exact squared L2 distances and keep
+    the best k per query. `exact_vectors(candidate_ids)` returns
+    (vectors, found_mask); candidates without an exact vector keep their
+    approximate distance.
+    """
+    out_distances = np.full((len(ids), k), np.inf, dtype="float32")
+    out_ids = np.full((len(ids), k), -1, dtype="int64")
+    for row, (query, row_distances, row_ids) in enumerate(zip(query_vecs, distances, ids)):
+        valid = row_ids >= 0  # FAISS pads missing hits with -1
+        row_ids, row_distances = row_ids[valid], row_distances[valid].copy()
+        if not len(row_ids):
+            continue
+        vectors, found = exact_vectors(row_ids)
+        if found.any():
+            diff = vectors[found] - query
+            row_distances[found] = np.einsum("ij,ij->i", diff, diff)
+        order = np.argsort(row_distances, kind="stable")[:k]
+        out_distances[row, :len(order)] = row_distances[order]
+        out_ids[row, :len(order)] = row_ids[order]
+    return out_distances, out_ids
@@ -0,0 +1,114 @@
+# backend/chunk_store.py
+import json
+import mmap
+import os
+
+import numpy as np
+
+
+def encode_chunk(chunk: dict) -> bytes:
+    return json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ChunkTable:
+    """
+    Read-only chunk metadata for one index generation, fetched by chunk ID.
+
+    Two files: `<index_path>` is a (2, n+1) int64 .npy array whose first row
+    holds the sorted chunk IDs and whose second row holds byte offsets into
+    `<blob_path>`, the concatenated JSON records. Both are memory-mapped, so
+    opening a table reads nothing and a search decodes only its k hits.
+    """
+
+    def __init__(self, index_path: str, blob_path: str):
+        self.index_path = index_path
+        self.blob_path = blob_path
+        table = np.load(index_path, mmap_mode="r")
+        self._ids = table[0, :-1]  # rows are contiguous, so searchsorted needs no copy
+        self._offsets = table[1]
+        self._file = open(blob_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def write(index_path: str, blob_path: str, records, base: "ChunkTable" = None, replaced=None) -> int:
+        """
+        Write a table from (chunk_id, chunk) pairs in ascending ID order; a chunk
+        may be a dict or an already-encoded record. Records are streamed to the
+        blob, only the IDs and offsets are held in memory. With `base`, the
+        records replace base's rows in the `replaced` [start, end) ID range and
+        base's other rows are copied over in bulk, without a per-row pass.
+        Returns the row count.
+        """
+        lo = hi = 0
+        if base is not None:
+            lo, hi = (int(i) for i in np.searchsorted(base._ids, replaced))
+        ids, offsets = [], [0]
+        previous = None
+        with open(blob_path, "wb") as blob:
+            if base is not None:
+                blob.write(memoryview(base._blob)[:int(base._offsets[lo])])
+                offsets[0] = int(base._offsets[lo])
+            for chunk_id, chunk in records:
+                if previous is not None and chunk_id <= previous:
+                    raise ValueError(f"Chunk IDs must be strictly increasing ({chunk_id} after {previous})")
+                if base is not None and not replaced[0] <= chunk_id < replaced[1]:
+                    raise ValueError(f"Chunk {chunk_id} is outside the replaced range {replaced}")
+                record = chunk if isinstance(chunk, bytes) else encode_chunk(chunk)
+                blob.write(record)
+                ids.append(chunk_id)
+                offsets.append(offsets[-1] + len(record))
+                previous = chunk_id
+            if base is not None:
+                blob.write(memoryview(base._blob)[int(base._offsets[hi]):int(base._offsets[-1])])
+
+        if base is None:
+            table = np.zeros((2, len(ids) + 1), dtype="int64")
+            table[0, :-1] = ids
+            table[1] = offsets
+        else:
+            tail = base._offsets[hi:] - base._offsets[hi] + offsets[-1]
+            table = np.zeros((2, lo + len(ids) + len(base) - hi + 1), dtype="int64")
+            table[0, :-1] = np.concatenate([base._ids[:lo], np.array(ids, dtype="int64"), base._ids[hi:]])
+            table[1] = np.concatenate([base._offsets[:lo], np.array(offsets[:-1], dtype="int64"), tail])
+        with open(index_path, "wb") as f:
+            np.save(f, table)
+        return table.shape[1] - 1
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _row(self, chunk_id: int):
+        row = int(np.searchsorted(self._ids, chunk_id))
+        if row < len(self._ids) and self._ids[row] == chunk_id:
+            return row
+        return None
+
+    def __contains__(self, chunk_id) -> bool:
+        return self._row(int(chunk_id)) is not None
+
+    def raw(self, chunk_id: int):
+        """Encoded record for a chunk, or None."""
+        row = self._row(chunk_id)
+        if row is None:
+            return None
+        return self._blob[int(self._offsets[row]):int(self._offsets[row + 1])]
+
+    def get(self, chunk_id: int, default=None):
+        record = self.raw(chunk_id)
+        return json.loads(record) if record is not None else default
+
+    def raw_items(self, skip_range=None):
+        """Yield (chunk_id, encoded record) in ID order, optionally skipping a [start, end) ID range."""
+        start = end = 0
+        if skip_range is not None:
+            start, end = (int(np.searchsorted(self._ids, bound)) for bound in skip_range)
+        for row in range(len(self._ids)):
+            if start <= row < end:
+                continue
+            yield int(self._ids[row]), self._blob[int(self._offsets[row]):int(self._offsets[row + 1])]
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
@@ -0,0 +1,232 @@
+# backend/concurrency.py
+import asyncio
+import copy
+import functools
+import math
+import os
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+# Threads for CPU-bound work (embedding, FAISS, PDF parsing) kept off the event loop
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Claims allowed through the parse/LLM pipeline at once; the rest wait their turn
+MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", "8"))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="policymind-cpu")
+
+# One semaphore per event loop: asyncio primitives must not cross loops
+_query_slots = weakref.WeakKeyDictionary()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the bounded CPU executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(fn, *args, **kwargs))
+
+
+def query_slot() -> asyncio.Semaphore:
+    """Semaphore bounding concurrent claims on the current event loop."""
+    loop = asyncio.get_running_loop()
+    slots = _query_slots.get(loop)
+    if slots is None:
+        slots = _query_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+    return slots
+
+
+@contextmanager
+def interprocess_lock(path: str, shared: bool = False):
+    """
+    Exclusive advisory lock on `path` (created if missing), held across
+    processes such as uvicorn workers sharing data/; `shared` takes it for
+    reading alongside other readers. Not reentrant: a process must not take
+    the same lock twice. A no-op where fcntl is unavailable.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    computation, later callers with the same key await that same result
+    instead of starting their own. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._inflight = weakref.WeakKeyDictionary()  # loop -> {key: task}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs), sharing one run among concurrent callers with `key`."""
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(loop)
+        if inflight is None:
+            inflight = self._inflight[loop] = {}
+
+        task = inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+
+        # Shielded, so one caller disconnecting doesn't cancel the shared work;
+        # everyone gets a copy so callers can't mutate each other's result
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> dict:
+        return {"leaders": self.leaders, "coalesced": self.coalesced}
+
+
+class Overloaded(Exception):
+    """Work refused by admission control; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, name: str, reason: str, retry_after: int):
+        super().__init__(f"{name} overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionControl:
+    """
+    Bounded concurrency in front of a slow backend (one local Ollama model).
+
+    Each backend call is admitted on its way in: the backend serves
+    `max_concurrency` calls at a time and at most `max_queue` more may wait.
+    A call is also refused when the work already outstanding would keep it
+    queued, by a moving average of service times, for more than `max_wait`
+    seconds, since it would time out anyway; an idle backend always admits.
+    Refusals raise Overloaded with a Retry-After hint, so excess load is shed
+    at once instead of queueing without bound.
+
+    `slot()` admits one call and holds one of the backend's slots around it;
+    slots are granted in FIFO order, and a wait past `max_wait` gives up
+    with Overloaded as well. Work that never reaches the backend (cache
+    hits, coalesced duplicates) never takes a slot, so it is never shed.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait: float,
+                 expected_service: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.service_seconds = expected_service  # moving average of slot hold times
+        self.outstanding = 0  # admitted units not yet released
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "wait_estimate": 0, "wait_timeout": 0}
+        self._waits = deque(maxlen=1024)  # recent slot wait times, seconds
+        self._slots = weakref.WeakKeyDictionary()  # loop -> Semaphore
+
+    def estimated_wait(self) -> float:
+        """Queue time for the next unit: full rounds of service for the work already outstanding."""
+        return self.outstanding // self.max_concurrency * self.service_seconds
+
+    def admit(self, weight: int = 1) -> "Admission":
+        """
+        Admit `weight` units of work or raise Overloaded; release the returned
+        ticket when done. Weights above the total capacity are clipped, so an
+        oversized request is admitted once the backend is idle.
+        """
+        weight = min(max(1, weight), self.max_concurrency + self.max_queue)
+        if self.outstanding:
+            if self.outstanding + weight > self.max_concurrency + self.max_queue:
+                self._refuse("queue_full", self.service_seconds)
+            wait = self.estimated_wait()
+            if wait > self.max_wait:
+                self._refuse("wait_estimate", wait - self.max_wait)
+        self.outstanding += weight
+        self.admitted += weight
+        return Admission(self, weight)
+
+    def _refuse(self, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        raise Overloaded(self.name, reason, max(1, math.ceil(retry_after)))
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._slots.get(loop)
+        if semaphore is None:
+            semaphore = self._slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """Admit one call and hold one of the backend's `max_concurrency` slots for its duration."""
+        with self.admit():
+            semaphore = self._semaphore()
+            queued_at = time.monotonic()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self._refuse("wait_timeout", self.service_seconds)
+            finally:
+                self.waiting -= 1
+            started = time.monotonic()
+            self._waits.append(started - queued_at)
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+                semaphore.release()
+                self.service_seconds = 0.8 * self.service_seconds + 0.2 * (time.monotonic() - started)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "outstanding": self.outstanding,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "service_seconds_avg": round(self.service_seconds, 3),
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_ms_p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 1) if waits else 0.0,
+        }
+
+
+class Admission:
+    """Ticket for admitted work; `release` is idempotent, so error paths may call it again."""
+
+    def __init__(self, control: AdmissionControl, weight: int):
+        self._control = control
+        self._weight = weight
+
+    def release(self):
+        if self._weight:
+            self._control.outstanding -= self._weight
+            self._weight = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -1,20 +1,55 @@
 # backend/document_processor.py
 import fitz  # PyMuPDF
+import hashlib
 import re
 import os
 import json
 
-OUTPUT_PATH = "data/parsed_output.json"
+CHUNKS_DIR = "data/chunks"
+
+# Chunk IDs are (document key << CHUNK_ORDINAL_BITS) | ordinal, so every
+# document owns a contiguous, stable ID range in the vector index.
+CHUNK_ORDINAL_BITS = 20
+DOC_KEY_BITS = 40
+
+# Section headings: "Section C - Exclusions", "PART II", or short all-caps lines
+HEADING_PATTERN = re.compile(r"^(?:section|part|chapter)\s+[\w.-]+\b", re.IGNORECASE)
+
+def is_heading(line_text):
+    if HEADING_PATTERN.match(line_text):
+        return True
+    letters = [c for c in line_text if c.isalpha()]
+    return len(line_text) <= 80 and len(letters) >= 4 and line_text.isupper()
 
 def guess_clause_id(text):
     """Extract clause ID like Code-Excl01 from text."""
     match = re.search(r"\(Code-Excl\d+\)", text)
     return match.group(0) if match else "general"
 
-def save_and_process_pdf(filepath):
+def normalize_clause_id(clause_id):
+    """Lookup key for a clause code: "(Code-Excl01)" and "code-excl01" both give "code-excl01"."""
+    if not clause_id or clause_id == "general":
+        return None
+    return clause_id.strip().strip("()").lower()
+
+def document_id_for(filepath):
+    """Documents are identified by file name, so re-uploading a file replaces it."""
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+def doc_id_range(doc_id):
+    """Half-open [start, end) chunk ID range owned by a document."""
+    digest = hashlib.sha1(doc_id.encode("utf-8")).digest()
+    doc_key = int.from_bytes(digest[:DOC_KEY_BITS // 8], "big")
+    start = doc_key << CHUNK_ORDINAL_BITS
+    return start, start + (1 << CHUNK_ORDINAL_BITS)
+
+def extract_chunks(filepath):
+    """Parse a PDF into clause chunks without touching the chunk store."""
     doc = fitz.open(filepath)
     chunks = []
     current_section = ""
+    heading = ""  # last section heading seen
+    section_heading = ""  # heading in effect when current_section started
 
     for page in doc:
         blocks = page.get_text("dict")["blocks"]
@@ -27,29 +62,79 @@ def save_and_process_pdf(filepath):
                 ]).strip()
                 if not line_text:
                     continue
+                if is_heading(line_text):
+                    heading = line_text
 
                 # Detect new clause by pattern
                 if re.match(r"^\d+\)|[A-Z][a-z]+.*\(Code-Excl", line_text):
                     if current_section:
                         chunks.append({
                             "text": current_section.strip(),
-                            "clause_id": guess_clause_id(current_section)
+                            "clause_id": guess_clause_id(current_section),
+                            "section": section_heading
                         })
                     current_section = line_text
+                    section_heading = heading
                 else:
+                    if not current_section:
+                        section_heading = heading
                     current_section += " " + line_text
 
     if current_section:
         chunks.append({
             "text": current_section.strip(),
-            "clause_id": guess_clause_id(current_section)
+            "clause_id": guess_clause_id(current_section),
+            "section": section_heading
         })
 
     doc.close()
+    return chunks
+
+def assign_chunk_ids(doc_id, chunks):
+    """Tag chunks with their document and stable chunk IDs."""
+    start, end = doc_id_range(doc_id)
+    if len(chunks) > end - start:
+        raise ValueError(f"{doc_id} has {len(chunks)} chunks, more than the {end - start} a document may hold")
+    for ordinal, chunk in enumerate(chunks):
+        chunk["doc_id"] = doc_id
+        chunk["chunk_id"] = start + ordinal
+    return chunks
+
+def iter_documents(chunks_dir=CHUNKS_DIR):
+    """
+    Yield (doc_id, chunks) for every stored document, one file at a time,
+    ordered by chunk ID range so the chunks come out in ascending ID order.
+    """
+    if not os.path.isdir(chunks_dir):
+        return
+    doc_ids = [name[:-len(".json")] for name in os.listdir(chunks_dir) if name.endswith(".json")]
+    for doc_id in sorted(doc_ids, key=lambda d: doc_id_range(d)[0]):
+        with open(os.path.join(chunks_dir, f"{doc_id}.json"), "r", encoding="utf-8") as f:
+            yield doc_id, json.load(f)
+
+def load_all_chunks(chunks_dir=CHUNKS_DIR):
+    """Every chunk in the per-document store, in ascending chunk ID order."""
+    return [chunk for _, chunks in iter_documents(chunks_dir) for chunk in chunks]
+
+def save_and_process_pdf(filepath, chunks_dir=CHUNKS_DIR):
+    """Parse a PDF into its own entry in the chunk store; returns (doc_id, chunks)."""
+    doc_id = document_id_for(filepath)
+    chunks = assign_chunk_ids(doc_id, extract_chunks(filepath))
 
     # Save chunks
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+    os.makedirs(chunks_dir, exist_ok=True)
+    doc_path = os.path.join(chunks_dir, f"{doc_id}.json")
+    with open(doc_path, "w", encoding="utf-8") as f:
         json.dump(chunks, f, indent=2)
 
-    print(f"✅ Document parsed into {len(chunks)} chunks and saved to {OUTPUT_PATH}")
\ No newline at end of file
+    print(f"✅ Document parsed into {len(chunks)} chunks and saved to {doc_path}")
+    return doc_id, chunks
+
+def remove_document(doc_id, chunks_dir=CHUNKS_DIR):
+    """Drop a document from the chunk store. Returns False if it was not stored."""
+    doc_path = os.path.join(chunks_dir, f"{doc_id}.json")
+    if not os.path.exists(doc_path):
+        return False
+    os.remove(doc_path)
+    print(f"🗑️ Removed {doc_id} from chunk store")
+    return True
@@ -0,0 +1,169 @@
+# backend/embedder.py
+import abc
+import os
+
+import numpy as np
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+HF_MODEL_ID = f"sentence-transformers/{EMBEDDING_MODEL}"
+
+# torch = SentenceTransformer (reference); onnx = exported graph on ONNX Runtime
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "torch")
+ONNX_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("data", "onnx", EMBEDDING_MODEL))
+# Dynamic int8 quantization of the exported graph's weights (MatMul/Gemm)
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "1") == "1"
+# Threads per ONNX Runtime session (0 = one per core); MiniLM gains nothing from inter-op parallelism
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces and L2-normalizes its mean-pooled output
+MAX_SEQ_LENGTH = 256
+
+
+class Embedder(abc.ABC):
+    """
+    Interface shared by the embedding backends: `encode(texts)` returns a
+    float32 (n, dim) array; a backend that doesn't implement it can't be
+    instantiated. `name` identifies the backend's vectors, e.g. for
+    embedding cache keys, since backends agree only approximately.
+    """
+
+    name = EMBEDDING_MODEL
+    dim = 0
+
+    @abc.abstractmethod
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Embed `texts` as a float32 (len(texts), dim) array."""
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+class TorchEmbedder(Embedder):
+    """The reference SentenceTransformer model on PyTorch."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.name = model_name
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.device = self.model.device.type
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=show_progress_bar),
+            dtype="float32",
+        )
+
+
+def onnx_model_path(model_dir: str = ONNX_DIR, quantized: bool = ONNX_QUANTIZE) -> str:
+    return os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+
+
+def export_onnx(model_dir: str = ONNX_DIR, quantize: bool = ONNX_QUANTIZE) -> str:
+    """
+    Export the transformer under all-MiniLM-L6-v2 to ONNX (pooling is done in
+    numpy), save its tokenizer next to it and optionally quantize the weights
+    to int8. Needs torch/transformers, but only here. Returns the model path.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_ID)
+    model = AutoModel.from_pretrained(HF_MODEL_ID).eval()
+    tokenizer.save_pretrained(model_dir)
+
+    fp32_path = onnx_model_path(model_dir, quantized=False)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                          "token_type_ids": dynamic, "last_hidden_state": dynamic},
+            opset_version=14,
+        )
+    print(f"📦 Exported {HF_MODEL_ID} to {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = onnx_model_path(model_dir, quantized=True)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"🗜 Quantized weights to int8: {int8_path}")
+    return int8_path
+
+
+class OnnxEmbedder(Embedder):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (CPU), with the `tokenizers` fast
+    tokenizer, so neither torch nor transformers is imported at serve time.
+    The model is exported on first use if `model_dir` has none.
+    """
+
+    def __init__(self, model_dir: str = ONNX_DIR, quantized: bool = ONNX_QUANTIZE,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS, inter_op_threads: int = ONNX_INTER_OP_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = onnx_model_path(model_dir, quantized)
+        if not os.path.exists(path):
+            export_onnx(model_dir, quantize=quantized)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        self.name = f"{EMBEDDING_MODEL}:onnx-{'int8' if quantized else 'fp32'}"
+        self.dim = self.session.get_outputs()[0].shape[-1]
+        self.device = "cpu"
+
+    def _encode_batch(self, texts) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype="int64"),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype="int64"),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype="int64"),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feed.items() if k in self._input_names})[0]
+
+        # Mean pooling over real tokens, then L2 normalization (as the reference model does)
+        mask = feed["attention_mask"][..., None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        texts = list(texts)
+        out = np.empty((len(texts), self.dim), dtype="float32")
+        # Batch texts of similar length together so little compute goes to padding
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            out[rows] = self._encode_batch([texts[i] for i in rows])
+            if show_progress_bar:
+                print(f"🧮 Encoded {min(start + batch_size, len(texts))}/{len(texts)} texts", end="\r")
+        return out
+
+
+EMBEDDER_BACKENDS = {"torch": TorchEmbedder, "onnx": OnnxEmbedder}
+
+
+def load_embedder(backend: str = EMBEDDER_BACKEND) -> Embedder:
+    if backend not in EMBEDDER_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDER_BACKEND {backend!r}; expected one of {sorted(EMBEDDER_BACKENDS)}")
+    return EMBEDDER_BACKENDS[backend]()
@@ -0,0 +1,104 @@
+# backend/embedding_batcher.py
+import asyncio
+import os
+import time
+
+import numpy as np
+
+# Coalesce concurrent query encodes into one embedder call
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+# How long the first query of a batch waits for company, and how many texts a batch may hold
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching front for an embedder, on the event loop. Callers await
+    `encode(texts)`, which parks a loop future; one dispatcher task takes the
+    oldest waiting request, gathers more for up to `max_wait_ms` or until
+    `max_batch_size` texts, sends only the embedder call to `executor` and
+    hands each caller its rows. Waiting costs no thread, so a batch can hold
+    as many queries as are in flight. Requests arriving during an encode form
+    the next batch. A request larger than a batch is encoded on its own.
+    """
+
+    def __init__(self, encode, max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS,
+                 max_batch_size: int = EMBED_BATCH_MAX_SIZE, executor=None):
+        self._encode = encode
+        self._executor = executor
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []  # (texts, future, arrival time), oldest first
+        self._pending_texts = 0
+        self._wake = None  # future the dispatcher sleeps on until a batch fills up
+        self._dispatcher = None
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.largest_batch = 0
+
+    async def encode(self, texts) -> np.ndarray:
+        """Embed `texts` as part of whatever batch is forming."""
+        texts = list(texts)
+        loop = asyncio.get_running_loop()
+        if not texts:
+            return np.asarray(await loop.run_in_executor(self._executor, self._encode, []), dtype="float32")
+        future = loop.create_future()
+        self._pending.append((texts, future, time.monotonic()))
+        self._pending_texts += len(texts)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        elif self._pending_texts >= self.max_batch_size and self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
+        return await future
+
+    def _take(self):
+        """Pop the oldest requests that fit in one batch (at least one)."""
+        batch, size = [], 0
+        while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch_size):
+            request = self._pending.pop(0)
+            batch.append(request)
+            size += len(request[0])
+        self._pending_texts -= size
+        return batch, size
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            wait = self._pending[0][2] + self.max_wait - time.monotonic()
+            if self._pending_texts < self.max_batch_size and wait > 0:
+                self._wake = loop.create_future()
+                await asyncio.wait([self._wake], timeout=wait)
+                self._wake = None
+            batch, size = self._take()
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor, self._encode, [t for texts, _, _ in batch for t in texts])
+                vectors = np.asarray(vectors, dtype="float32")
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            start = 0
+            for texts, future, _ in batch:
+                if not future.done():  # the caller may have been cancelled
+                    future.set_result(vectors[start:start + len(texts)])
+                start += len(texts)
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += size
+            self.largest_batch = max(self.largest_batch, size)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": len(self._pending),
+        }
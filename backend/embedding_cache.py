@@ -0,0 +1,224 @@
+# backend/embedding_cache.py
+import hashlib
+import os
+import threading
+import numpy as np
+
+from backend.concurrency import interprocess_lock
+
+CACHE_DIR = "data/embedding_cache"
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))
+INITIAL_CAPACITY = 1024
+
+# One journal record: a slot now holds the vector of `key`, last used at `tick`
+SLOT_RECORD = np.dtype([("slot", "<i8"), ("key", "u1", 16), ("tick", "<i8")])
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk embedding cache.
+
+    Vectors live in a memory-mapped float32 array; sha256(model name + text)
+    maps to a row in it. Rows are evicted least recently used once
+    `max_entries` is reached, and freed rows are reused. Slot assignments are
+    appended to a journal, so an insert writes only its own records and
+    processes sharing the cache (uvicorn workers) catch up by reading the
+    journal's tail. Inserts hold the file lock; reads hold it shared, so a
+    row is never read while another process reuses it.
+    """
+
+    def __init__(self, model_name: str, dim: int, cache_dir: str = CACHE_DIR, max_entries: int = MAX_ENTRIES):
+        self.model_name = model_name
+        self.dim = dim
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(cache_dir, f"vectors.{dim}.f32")
+        self.journal_path = os.path.join(cache_dir, f"slots.{dim}.log")
+        self.lock_path = os.path.join(cache_dir, f"LOCK.{dim}")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._lock, interprocess_lock(self.lock_path):
+            self._open()
+
+    def _open(self):
+        """Rebuild the slot table from the whole journal."""
+        self._slot_keys = np.zeros((0, 16), dtype="uint8")
+        self._ticks = np.zeros(0, dtype="int64")  # 0 marks a free slot
+        self._tick = 0
+        self._slots = {}
+        self._journal_id = None
+        self._journal_records = 0
+        self._vectors = None
+        self._resize(min(INITIAL_CAPACITY, self.max_entries))
+        self._catch_up()
+
+    def _catch_up(self):
+        """Apply journal records other processes appended since we last looked (all of them after a compaction)."""
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return
+        journal_id = (st.st_dev, st.st_ino)
+        if self._journal_id is not None and journal_id != self._journal_id:
+            self._open()  # compacted into a new file
+            return
+        self._journal_id = journal_id
+        total = st.st_size // SLOT_RECORD.itemsize
+        if total <= self._journal_records:
+            return
+        records = np.fromfile(self.journal_path, dtype=SLOT_RECORD, count=total - self._journal_records,
+                              offset=self._journal_records * SLOT_RECORD.itemsize)
+        self._journal_records = total
+        self._resize(max(len(self._ticks), int(records["slot"].max()) + 1))
+        for slot, key, tick in zip(records["slot"].tolist(), records["key"], records["tick"].tolist()):
+            if self._ticks[slot]:
+                self._slots.pop(self._slot_keys[slot].tobytes(), None)
+            self._slot_keys[slot] = key
+            self._ticks[slot] = tick
+            self._slots[key.tobytes()] = slot
+        self._tick = max(self._tick, int(records["tick"].max()))
+
+    def _append(self, slots):
+        """Journal the given slots' current assignments; compacts the journal once it is mostly superseded."""
+        self._vectors.flush()  # rows reach the file before the journal points at them
+        records = np.zeros(len(slots), dtype=SLOT_RECORD)
+        records["slot"], records["key"], records["tick"] = slots, self._slot_keys[slots], self._ticks[slots]
+        if self._journal_records + len(records) > 2 * max(len(self._slots), INITIAL_CAPACITY):
+            self._compact()
+            return
+        with open(self.journal_path, "ab") as f:
+            records.tofile(f)
+        self._journal_records += len(records)
+        st = os.stat(self.journal_path)
+        self._journal_id = (st.st_dev, st.st_ino)
+
+    def _compact(self):
+        """Rewrite the journal as one record per occupied slot (with current LRU ticks)."""
+        used = np.flatnonzero(self._ticks)
+        records = np.zeros(len(used), dtype=SLOT_RECORD)
+        records["slot"], records["key"], records["tick"] = used, self._slot_keys[used], self._ticks[used]
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            records.tofile(f)
+        os.replace(tmp_path, self.journal_path)
+        st = os.stat(self.journal_path)
+        self._journal_id = (st.st_dev, st.st_ino)
+        self._journal_records = len(records)
+
+    def _resize(self, capacity: int):
+        """Grow the memmap file (and slot arrays) to `capacity` rows."""
+        if self._vectors is not None and capacity <= len(self._ticks):
+            return
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        needed_bytes = capacity * self.dim * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < needed_bytes:
+                f.truncate(needed_bytes)
+        self._vectors = np.memmap(self.vectors_path, dtype="float32", mode="r+", shape=(capacity, self.dim))
+        grow = capacity - len(self._ticks)
+        if grow > 0:
+            self._slot_keys = np.concatenate([self._slot_keys, np.zeros((grow, 16), dtype="uint8")])
+            self._ticks = np.concatenate([self._ticks, np.zeros(grow, dtype="int64")])
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()[:16]
+
+    def _allocate(self, count: int):
+        """Return `count` free slots, evicting LRU rows or growing the file as needed."""
+        overflow = len(self._slots) + count - self.max_entries
+        if overflow > 0:
+            used = np.flatnonzero(self._ticks)
+            victims = used[np.argpartition(self._ticks[used], overflow - 1)[:overflow]]
+            for slot in victims:
+                del self._slots[self._slot_keys[slot].tobytes()]
+            self._ticks[victims] = 0
+            self.evictions += len(victims)
+
+        free = np.flatnonzero(self._ticks == 0)
+        if len(free) < count:
+            self._resize(min(self.max_entries, max(len(self._ticks) * 2, len(self._slots) + count)))
+            free = np.flatnonzero(self._ticks == 0)
+        return free[:count]
+
+    def get_or_encode(self, texts, encode_fn):
+        """
+        Embeddings for `texts`, encoding only the ones not already cached.
+        `encode_fn(list_of_texts)` must return a float32 array of shape (n, dim).
+        """
+        keys = [self.key(t) for t in texts]
+        out = np.empty((len(texts), self.dim), dtype="float32")
+
+        with self._lock, interprocess_lock(self.lock_path, shared=True):
+            self._catch_up()  # rows may have been evicted and reused by another process
+            missing = {}
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._tick += 1
+                    self._ticks[slot] = self._tick
+                    out[i] = self._vectors[slot]
+            self.hits += len(texts) - sum(len(rows) for rows in missing.values())
+            self.misses += sum(len(rows) for rows in missing.values())
+
+        if not missing:
+            return out
+
+        miss_keys = list(missing)
+        encoded = np.asarray(encode_fn([texts[missing[k][0]] for k in miss_keys]), dtype="float32")
+        for key, vec in zip(miss_keys, encoded):
+            out[missing[key]] = vec
+
+        with self._lock, interprocess_lock(self.lock_path):
+            self._catch_up()  # another process may have inserted rows since we last looked
+            new_keys = [k for k in miss_keys if k not in self._slots]
+            new_rows = [encoded[j] for j, k in enumerate(miss_keys) if k not in self._slots]
+            # A single batch larger than the cache only keeps its tail
+            new_keys, new_rows = new_keys[-self.max_entries:], new_rows[-self.max_entries:]
+            if new_keys:
+                slots = self._allocate(len(new_keys))
+                self._vectors[slots] = np.stack(new_rows)
+                for slot, key in zip(slots, new_keys):
+                    self._tick += 1
+                    self._slots[key] = int(slot)
+                    self._slot_keys[slot] = np.frombuffer(key, dtype="uint8")
+                    self._ticks[slot] = self._tick
+                self._append(slots)
+        return out
+
+    def lookup(self, texts):
+        """
+        Cached vectors for `texts` without encoding anything (used to re-rank
+        search candidates). Returns (vectors, found_mask); hit/miss stats and
+        LRU order are left alone.
+        """
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        found = np.zeros(len(texts), dtype=bool)
+        with self._lock, interprocess_lock(self.lock_path, shared=True):
+            self._catch_up()
+            for i, text in enumerate(texts):
+                slot = self._slots.get(self.key(text))
+                if slot is not None:
+                    out[i] = self._vectors[slot]
+                    found[i] = True
+        return out, found
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._slots),
+            "max_entries": self.max_entries,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,329 @@
+# backend/ingest_jobs.py
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+from backend.concurrency import interprocess_lock
+from backend.tenants import TenantPaths, tenant_name
+
+UPLOAD_DIR = "data/uploaded_docs"
+# Shared by all tenants: staged files are moved into the tenant's upload dir
+INCOMING_DIR = os.path.join(UPLOAD_DIR, ".incoming")
+HASHES_PATH = "data/content_hashes.json"
+# Job state as seen by every uvicorn worker, whichever one runs the job
+JOBS_DIR = "data/jobs"
+UPLOAD_READ_SIZE = 1 << 20  # bytes per streamed read
+MAX_FINISHED_JOBS = int(os.getenv("INGEST_MAX_FINISHED_JOBS", "1000"))
+
+ACTIVE_STATES = ("queued", "parsing", "indexing")
+
+
+class ContentHashes:
+    """
+    Persistent sha256 -> doc_id map of indexed uploads, used to skip duplicates.
+    Re-read when another process has rewritten it; changes are made under a
+    file lock on the freshly read map, so concurrent workers don't lose each
+    other's entries.
+    """
+
+    def __init__(self, path: str = HASHES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._by_hash = {}
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._by_hash = json.load(f)
+        except ValueError:
+            self._by_hash = {}
+        self._mtime = mtime
+
+    def get(self, digest: str):
+        with self._lock:
+            self._reload()
+            return self._by_hash.get(digest)
+
+    def record(self, digest: str, doc_id: str):
+        """Map `digest` to `doc_id`, dropping the hash of any older copy of that document."""
+        with self._lock, interprocess_lock(self.path + ".lock"):
+            self._reload()
+            self._by_hash = {h: d for h, d in self._by_hash.items() if d != doc_id}
+            self._by_hash[digest] = doc_id
+            self._save()
+
+    def forget(self, doc_id: str):
+        with self._lock, interprocess_lock(self.path + ".lock"):
+            self._reload()
+            self._by_hash = {h: d for h, d in self._by_hash.items() if d != doc_id}
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._by_hash, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+
+class IngestJobs:
+    """
+    Background indexing of uploaded PDFs.
+
+    Uploads are handed over as files already on disk; one worker thread parses
+    and indexes them in submission order (index updates are serialized by the
+    vector store anyway). Job state is kept in memory and polled through
+    `get`; the oldest finished jobs are forgotten past `max_finished`.
+    Duplicates are detected per tenant: each tenant has its own hash map.
+    Every state change is also written to `jobs_dir`, so a job can be polled
+    through any uvicorn worker, not only the one running it. Jobs record the
+    process that owns them; `recover_interrupted` fails the unfinished jobs
+    of processes that are gone, so they don't stay queued forever.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS, jobs_dir: str = JOBS_DIR):
+        self.max_finished = max_finished
+        self.jobs_dir = jobs_dir
+        self._hashes = {}  # tenant -> ContentHashes, loaded on first use
+        self._jobs = {}
+        self._pending_hashes = {}  # (tenant, digest) -> job_id for queued or running jobs
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.owner = uuid.uuid4().hex
+        self._owner_lock = None  # held open (and flock'ed) for the life of the process
+
+    def _owner_path(self, owner: str) -> str:
+        return os.path.join(self.jobs_dir, "owners", f"{owner}.lock")
+
+    def _claim_owner(self):
+        """Take this process's owner lock; the OS releases it when the process dies."""
+        if self._owner_lock is None:
+            path = self._owner_path(self.owner)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._owner_lock = open(path, "a")
+            if fcntl is not None:
+                fcntl.flock(self._owner_lock.fileno(), fcntl.LOCK_EX)
+
+    def _owner_alive(self, owner) -> bool:
+        if owner == self.owner:
+            return True
+        if not owner or fcntl is None:
+            return False  # jobs from before owners were recorded; without fcntl, one process owns everything
+        try:
+            with open(self._owner_path(owner), "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        os.remove(self._owner_path(owner))
+        return False
+
+    def recover_interrupted(self) -> int:
+        """
+        Mark persisted jobs still queued, parsing or indexing as `error` when
+        the process that owned them has exited (e.g. a server restart), so
+        clients polling them get an answer. Returns the number of jobs failed.
+        """
+        try:
+            names = [n for n in os.listdir(self.jobs_dir) if n.endswith(".json")]
+        except FileNotFoundError:
+            return 0
+        failed = 0
+        for name in names:
+            try:
+                with open(os.path.join(self.jobs_dir, name), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job.get("status") not in ACTIVE_STATES or self._owner_alive(job.get("owner")):
+                continue
+            job.update(status="error", updated_at=time.time(),
+                       message="Indexing was interrupted by a server restart; please upload the document again.")
+            self._persist(job)
+            failed += 1
+        if failed:
+            print(f"⚠️ Marked {failed} interrupted ingest job(s) as failed")
+        return failed
+
+    def _start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="policymind-ingest", daemon=True)
+            self._worker.start()
+
+    def hashes(self, tenant: str = None) -> ContentHashes:
+        tenant = tenant_name(tenant)
+        with self._lock:
+            if tenant not in self._hashes:
+                self._hashes[tenant] = ContentHashes(TenantPaths(tenant).hashes_path)
+            return self._hashes[tenant]
+
+    def submit(self, staged_path: str, filename: str, digest: str, tenant: str = None) -> dict:
+        """
+        Queue a staged upload for indexing into a tenant's namespace. Content
+        the tenant already indexed, or already waiting in the queue, is not
+        processed again: the staged file is dropped and the returned job is
+        marked `duplicate` (or is the pending one).
+        """
+        tenant = tenant_name(tenant)
+        hashes = self.hashes(tenant)
+        now = time.time()
+        self._claim_owner()
+        with self._lock:
+            pending_id = self._pending_hashes.get((tenant, digest))
+            if pending_id is not None:
+                os.remove(staged_path)
+                return dict(self._jobs[pending_id])
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "tenant": tenant,
+                "owner": self.owner,
+                "filename": filename,
+                "content_hash": digest,
+                "doc_id": None,
+                "chunks": None,
+                "message": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            existing = hashes.get(digest)
+            if existing is not None:
+                os.remove(staged_path)
+                job.update(status="duplicate", doc_id=existing,
+                           message=f"Identical content is already indexed as {existing}.")
+            else:
+                job["status"] = "queued"
+                self._pending_hashes[(tenant, digest)] = job["job_id"]
+                self._queue.put((job["job_id"], staged_path))
+            self._jobs[job["job_id"]] = job
+            self._persist(job)
+            self._prune()
+            snapshot = dict(job)
+
+        self._start()
+        return snapshot
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        # Submitted to another worker
+        if len(job_id) != 32 or any(c not in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._job_path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job: dict):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        path = self._job_path(job["job_id"])
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(path + ".tmp", path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"queue_depth": self._queue.qsize(), "jobs": counts}
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated_at=time.time())
+            if job["status"] not in ACTIVE_STATES:
+                self._pending_hashes.pop((job["tenant"], job["content_hash"]), None)
+            self._persist(job)
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["status"] not in ACTIVE_STATES]
+        for job in sorted(finished, key=lambda j: j["updated_at"])[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job["job_id"]]
+            try:
+                os.remove(self._job_path(job["job_id"]))
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            job_id, staged_path = self._queue.get()
+            try:
+                self._process(job_id, staged_path)
+            except Exception as e:
+                self._update(job_id, status="error", message=str(e))
+                if os.path.exists(staged_path):
+                    os.remove(staged_path)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job_id: str, staged_path: str):
+        from backend.document_processor import save_and_process_pdf
+        from backend.vector_store import update_document_index
+
+        job = self.get(job_id)
+        paths = TenantPaths(job["tenant"])
+        os.makedirs(paths.upload_dir, exist_ok=True)
+        file_path = os.path.join(paths.upload_dir, job["filename"])
+        # Publish under the real name only now, so a re-upload never overwrites a file mid-parse
+        os.replace(staged_path, file_path)
+
+        self._update(job_id, status="parsing")
+        doc_id, chunks = save_and_process_pdf(file_path, paths.chunks_dir)
+        # Only this document's chunks are embedded; an existing copy is replaced
+        self._update(job_id, status="indexing", doc_id=doc_id, chunks=len(chunks))
+        update_document_index(doc_id, chunks, paths.tenant)
+
+        self.hashes(paths.tenant).record(job["content_hash"], doc_id)
+        self._update(job_id, status="done", message="Document processed and indexed.")
+
+
+async def stage_upload(file):
+    """
+    Stream an UploadFile to a staging file in fixed-size reads, hashing as it
+    goes. Returns (staged_path, sha256 hex digest); the body is never held in
+    memory as a whole.
+    """
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    staged_path = os.path.join(INCOMING_DIR, f"{uuid.uuid4().hex}.pdf")
+    digest = hashlib.sha256()
+    try:
+        with open(staged_path, "wb") as f:
+            while True:
+                block = await file.read(UPLOAD_READ_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+    except BaseException:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        raise
+    return staged_path, digest.hexdigest()
+
+
+ingest_jobs = IngestJobs()
@@ -0,0 +1,261 @@
+# backend/json_utils.py
+import re
+
+
+class JsonObjectScanner:
+    """
+    Incremental, string-aware brace scanner for streamed LLM output.
+    Feed it text as it arrives; it reports when the first top-level JSON
+    object has closed, ignoring braces inside string literals.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.end = None  # offset just past the closing brace, once complete
+        self._consumed = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str) -> bool:
+        """Scan the next piece of output. Returns True once the object is complete."""
+        if self.end is not None:
+            return True
+        for i, ch in enumerate(text):
+            if not self.started:
+                # Anything before the first brace (markdown fences, preamble) is skipped
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = self._consumed + i + 1
+                    return True
+        self._consumed += len(text)
+        return False
+
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_BARE_CONSTANTS = {"true": True, "false": False, "null": None, "none": None}
+_VALUE_END = ",}]\n"
+
+
+# Unquoted value that is not a JSON constant (`high`, `.8`, `0.8 (high)`): its member is dropped
+_REJECTED = object()
+
+
+class _Truncated(Exception):
+    """The text ended in the middle of a value."""
+
+
+class _LenientParser:
+    """
+    Single forward pass over LLM output; every character is consumed once.
+    Tolerates what Phi-3 tends to produce: markdown fences and prose around
+    the object, unquoted or single-quoted keys, zero-padded numbers, trailing
+    or missing commas (also between a string and the next quoted key), stray
+    quotes inside strings and output cut off mid-object. Unquoted values
+    other than true/false/null (`high`, `.8`, `0.8 (high)`) are garbled, not
+    recoverable, so their members are dropped instead of passed on as text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.n = len(text)
+        self.pos = 0
+
+    def _skip_ws(self):
+        text, pos, n = self.text, self.pos, self.n
+        while pos < n and text[pos] in " \t\r\n":
+            pos += 1
+        self.pos = pos
+
+    def _significant_pos(self, pos: int) -> int:
+        text, n = self.text, self.n
+        while pos < n and text[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+    def _next_significant(self, pos: int) -> str:
+        pos = self._significant_pos(pos)
+        return self.text[pos] if pos < self.n else ""
+
+    def _key_follows(self, pos: int) -> bool:
+        """Whether a quoted key and its colon start at `pos`: a new member whose comma is missing."""
+        quote = self.text[pos] if pos < self.n else ""
+        if quote not in ("'", '"'):
+            return False
+        end = self.text.find(quote, pos + 1)
+        return end != -1 and self._next_significant(end + 1) in (":", "=")
+
+    def parse(self):
+        start = self.text.find("{")
+        if start == -1:
+            return None
+        self.pos = start
+        return self._object()
+
+    def _object(self) -> dict:
+        self.pos += 1  # opening brace
+        result = {}
+        while True:
+            self._skip_ws()
+            if self.pos >= self.n:
+                return result
+            ch = self.text[self.pos]
+            if ch == "}":
+                self.pos += 1
+                return result
+            if ch in ",;":
+                self.pos += 1
+                continue
+            try:
+                key = self._key()
+                self._skip_ws()
+                if self.pos < self.n and self.text[self.pos] in ":=":
+                    self.pos += 1
+                    value = self._value()
+                    if value is not _REJECTED:
+                        result[key] = value
+                elif self.pos >= self.n:
+                    return result
+                # A key with no value (e.g. `{approved}`) is dropped
+            except _Truncated:
+                # Incomplete last member: keep everything before it
+                return result
+
+    def _array(self) -> list:
+        self.pos += 1  # opening bracket
+        result = []
+        while True:
+            self._skip_ws()
+            if self.pos >= self.n:
+                return result
+            ch = self.text[self.pos]
+            if ch == "]":
+                self.pos += 1
+                return result
+            if ch == ",":
+                self.pos += 1
+                continue
+            if ch == "}":
+                # Mismatched close: treat as end of the array, let the object see it
+                return result
+            try:
+                value = self._value()
+                if value is not _REJECTED:
+                    result.append(value)
+            except _Truncated:
+                return result
+
+    def _key(self) -> str:
+        ch = self.text[self.pos]
+        if ch in "\"'":
+            return self._string(ch)
+        start = self.pos
+        text, n = self.text, self.n
+        while self.pos < n and text[self.pos] not in ":=,{}[]\n":
+            self.pos += 1
+        if self.pos >= n:
+            raise _Truncated()
+        key = text[start:self.pos].strip()
+        if not key:
+            # Stray punctuation: step over it so the scan always advances
+            self.pos = max(self.pos, start + 1)
+        return key
+
+    def _value(self):
+        self._skip_ws()
+        if self.pos >= self.n:
+            raise _Truncated()
+        ch = self.text[self.pos]
+        if ch == "{":
+            return self._object()
+        if ch == "[":
+            return self._array()
+        if ch in "\"'":
+            return self._string(ch)
+        match = _NUMBER.match(self.text, self.pos)
+        # A quote right after a number means a missing comma, not more value
+        if match and self._next_significant(match.end()) in _VALUE_END + ':"':
+            self.pos = match.end()
+            if self.pos >= self.n:
+                raise _Truncated()  # the number itself may be cut off
+            literal = match.group(0)
+            if "." in literal or "e" in literal or "E" in literal:
+                return float(literal)
+            return int(literal)  # int() also normalises zero-padding like 007
+        return self._bare()
+
+    def _bare(self):
+        start = self.pos
+        text, n = self.text, self.n
+        while self.pos < n and text[self.pos] not in _VALUE_END:
+            if text[self.pos] in "\"'" and self._key_follows(self.pos):
+                break
+            self.pos += 1
+        if self.pos >= n:
+            raise _Truncated()
+        word = text[start:self.pos].strip()
+        return _BARE_CONSTANTS.get(word.lower(), _REJECTED)
+
+    def _string(self, quote: str) -> str:
+        self.pos += 1  # opening quote
+        text, n = self.text, self.n
+        out = []
+        while self.pos < n:
+            ch = text[self.pos]
+            if ch == "\\" and self.pos + 1 < n:
+                esc = text[self.pos + 1]
+                if esc == "u" and self.pos + 5 < n:
+                    try:
+                        out.append(chr(int(text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                        continue
+                    except ValueError:
+                        pass
+                out.append(_ESCAPES.get(esc, esc))
+                self.pos += 2
+                continue
+            if ch == quote:
+                # Only a quote followed by a delimiter closes the string, so
+                # unescaped quotes inside prose ("the "knee" surgery") survive;
+                # so does a quoted key right after it (a missing comma)
+                after = self._significant_pos(self.pos + 1)
+                if after >= n or text[after] in _VALUE_END + ":]" or self._key_follows(after):
+                    self.pos += 1
+                    return "".join(out)
+            out.append(ch)
+            self.pos += 1
+        raise _Truncated()
+
+
+def parse_lenient_json(text: str):
+    """
+    Parse the first JSON object in raw LLM output in one linear pass.
+    Returns a dict, or None if the text contains no object at all.
+    """
+    if not text:
+        return None
+    try:
+        return _LenientParser(text).parse()
+    except RecursionError:
+        return None
@@ -0,0 +1,120 @@
+# backend/key_index.py
+import os
+
+import numpy as np
+
+
+def key_index_paths(name: str, generation: int, index_dir: str):
+    """(keys, offsets, ids) .npy files of one generation's `name` map, e.g. clause IDs or sections."""
+    return tuple(os.path.join(index_dir, f"{name}{part}.{generation}.npy") for part in ("keys", "offsets", "ids"))
+
+
+def _chunk_ids(entries: np.ndarray) -> np.ndarray:
+    return entries["chunk_id"] if entries.dtype.names else entries
+
+
+def merge_grouped(base, added, replaced):
+    """
+    Merge two (sorted keys, offsets, entries grouped by key) triples: `base`
+    without its entries whose chunk ID lies in the [start, end) range
+    `replaced`, plus `added`, whose chunk IDs all lie in that range. Entries
+    stay in chunk ID order within each key, and keys left without entries
+    are dropped. Vectorized and linear in the size of `base`, so an update
+    never re-reads the records behind it.
+    """
+    base_keys, base_offsets, base_entries = base
+    added_keys, added_offsets, added_entries = added
+    start, end = replaced
+    keys = np.union1d(base_keys, added_keys)
+    base_rows = np.repeat(np.searchsorted(keys, base_keys), np.diff(base_offsets))
+    added_rows = np.repeat(np.searchsorted(keys, added_keys), np.diff(added_offsets))
+
+    base_ids = _chunk_ids(base_entries)
+    keep = (base_ids < start) | (base_ids >= end)
+    base_rows, base_entries, base_ids = base_rows[keep], base_entries[keep], base_ids[keep]
+    counts = np.bincount(base_rows, minlength=len(keys))
+    # Within its key, an added entry goes after the kept entries with lower chunk IDs
+    below = np.bincount(base_rows[base_ids < start], minlength=len(keys))
+    at = (np.cumsum(counts) - counts + below)[added_rows]
+    entries = np.insert(base_entries, at, added_entries)
+
+    counts += np.bincount(added_rows, minlength=len(keys))
+    used = counts > 0
+    offsets = np.zeros(int(used.sum()) + 1, dtype="int64")
+    offsets[1:] = np.cumsum(counts[used])
+    return keys[used], offsets, entries
+
+
+def _key_array(keys) -> np.ndarray:
+    width = max((len(k) for k in keys), default=1)
+    return np.array(keys, dtype=f"<U{max(width, 1)}")
+
+
+class KeyIndexBuilder:
+    """Collects (key, chunk_id) pairs in ascending chunk ID order and writes them as a KeyIndex."""
+
+    def __init__(self):
+        self._ids = {}  # key -> [chunk_id]
+
+    def add(self, key: str, chunk_id: int):
+        self._ids.setdefault(key, []).append(chunk_id)
+
+    def arrays(self):
+        """(sorted keys, offsets, chunk IDs grouped by key)."""
+        keys = sorted(self._ids)
+        offsets = np.zeros(len(keys) + 1, dtype="int64")
+        offsets[1:] = np.cumsum([len(self._ids[k]) for k in keys])
+        ids = np.fromiter((i for k in keys for i in self._ids[k]), dtype="int64", count=int(offsets[-1]))
+        return _key_array(keys), offsets, ids
+
+    def write(self, keys_path: str, offsets_path: str, ids_path: str, base: "KeyIndex" = None,
+              replaced=None) -> int:
+        """
+        Write the map; returns the number of keys. With `base`, the pairs
+        collected here replace base's chunk IDs in the `replaced` range and
+        the rest of base is carried over.
+        """
+        keys, offsets, ids = self.arrays()
+        if base is not None:
+            keys, offsets, ids = merge_grouped(base.arrays(), (keys, offsets, ids), replaced)
+        np.save(keys_path, keys)
+        np.save(offsets_path, offsets)
+        np.save(ids_path, ids)
+        return len(keys)
+
+
+class KeyIndex:
+    """
+    Read-only key -> chunk IDs map for one generation: a sorted key array,
+    offsets and the chunk IDs grouped by key (ascending within a key). All
+    three are memory-mapped, so workers share them through the page cache
+    and a lookup reads only its own key's IDs.
+    """
+
+    def __init__(self, keys, offsets, ids):
+        self._keys = keys
+        self._offsets = offsets
+        self._ids = ids
+
+    @classmethod
+    def open(cls, keys_path: str, offsets_path: str, ids_path: str) -> "KeyIndex":
+        return cls(*(np.load(path, mmap_mode="r") for path in (keys_path, offsets_path, ids_path)))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def arrays(self):
+        return self._keys, self._offsets, self._ids
+
+    def get(self, key: str) -> np.ndarray:
+        """Chunk IDs stored under `key`, ascending; empty if the key is unknown."""
+        row = int(np.searchsorted(self._keys, key))
+        if row < len(self._keys) and self._keys[row] == key:
+            return self._ids[int(self._offsets[row]):int(self._offsets[row + 1])]
+        return self._ids[:0]
+
+    def with_prefix(self, prefix: str) -> np.ndarray:
+        """Chunk IDs of every key starting with `prefix` (keys are sorted, so they are one slice)."""
+        start = int(np.searchsorted(self._keys, prefix))
+        end = int(np.searchsorted(self._keys, prefix + "\U0010ffff"))
+        return self._ids[int(self._offsets[start]):int(self._offsets[end])]
@@ -0,0 +1,162 @@
+# backend/lexical_index.py
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from backend.key_index import merge_grouped
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Hyphenated terms such as code-excl02 or knee-replacement stay whole (and also
+# index their parts), so clause codes match exactly
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+CLAUSE_CODE_PATTERN = re.compile(r"\bcode-excl\d+\b", re.IGNORECASE)
+MAX_TERM_LENGTH = 32
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+# Postings keep raw term frequencies and chunk lengths, so BM25 weights are
+# computed per query and an update can merge postings without re-scoring the corpus
+POSTING_DTYPE = np.dtype([("chunk_id", "<i8"), ("tf", "<f4"), ("length", "<f4")])
+LENGTH_DTYPE = np.dtype([("chunk_id", "<i8"), ("length", "<f4")])
+
+
+def tokenize(text: str):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if "-" in token:
+            tokens.extend(part for part in token.split("-") if part not in STOPWORDS)
+        if token not in STOPWORDS:
+            tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def has_clause_code(query: str) -> bool:
+    return CLAUSE_CODE_PATTERN.search(query) is not None
+
+
+def lexical_paths(generation: int, index_dir: str):
+    """(terms, offsets, postings, chunk lengths) .npy files of one generation's lexical index."""
+    return tuple(os.path.join(index_dir, f"{part}.{generation}.npy")
+                 for part in ("lexterms", "lexoffsets", "lexpostings", "lexlengths"))
+
+
+class LexicalIndexBuilder:
+    """
+    Collects term frequencies chunk by chunk (in ascending chunk ID order),
+    then writes a BM25 inverted index: sorted terms, offsets, postings
+    grouped by term and every chunk's length.
+    """
+
+    def __init__(self):
+        self._postings = {}  # term -> [(chunk_id, tf, length)]
+        self._lengths = []  # (chunk_id, length)
+
+    def add(self, chunk_id: int, text: str):
+        tokens = tokenize(text)
+        self._lengths.append((chunk_id, len(tokens)))
+        for term, tf in Counter(tokens).items():
+            self._postings.setdefault(term, []).append((chunk_id, tf, len(tokens)))
+
+    def arrays(self):
+        """(sorted terms, offsets, postings grouped by term, chunk lengths)."""
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype="int64")
+        offsets[1:] = np.cumsum([len(self._postings[t]) for t in terms])
+        postings = np.array([p for t in terms for p in self._postings[t]], dtype=POSTING_DTYPE)
+        width = max((len(t) for t in terms), default=1)
+        return (np.array(terms, dtype=f"<U{width}"), offsets, postings,
+                np.array(self._lengths, dtype=LENGTH_DTYPE))
+
+    def write(self, terms_path: str, offsets_path: str, postings_path: str, lengths_path: str,
+              base: "LexicalIndex" = None, replaced=None) -> int:
+        """
+        Write the index; returns the vocabulary size. With `base`, the chunks
+        added here replace base's chunks in the `replaced` [start, end) ID
+        range and base's postings are merged in as they are, without
+        re-tokenizing its chunks.
+        """
+        terms, offsets, postings, lengths = self.arrays()
+        if base is not None:
+            terms, offsets, postings = merge_grouped(base.arrays()[:3], (terms, offsets, postings), replaced)
+            base_lengths = base.arrays()[3]
+            lo, hi = np.searchsorted(base_lengths["chunk_id"], replaced)
+            lengths = np.concatenate([base_lengths[:lo], lengths, base_lengths[hi:]])
+        np.save(terms_path, terms)
+        np.save(offsets_path, offsets)
+        np.save(postings_path, postings)
+        np.save(lengths_path, lengths)
+        return len(terms)
+
+
+class LexicalIndex:
+    """
+    Read-only BM25 index for one generation. All arrays are memory-mapped: a
+    query binary-searches the sorted vocabulary and reads only the postings
+    of its own terms, weighting them with the corpus size and average chunk
+    length computed once at load.
+    """
+
+    def __init__(self, terms_path: str, offsets_path: str, postings_path: str, lengths_path: str):
+        self._terms = np.load(terms_path, mmap_mode="r")
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._postings = np.load(postings_path, mmap_mode="r")
+        self._lengths = np.load(lengths_path, mmap_mode="r")
+        n = len(self._lengths)
+        self._n = n
+        self._avgdl = max(float(self._lengths["length"].sum()) / n, 1.0) if n else 1.0
+
+    def arrays(self):
+        return self._terms, self._offsets, self._postings, self._lengths
+
+    def _term_postings(self, term: str):
+        row = int(np.searchsorted(self._terms, term))
+        if row < len(self._terms) and self._terms[row] == term:
+            return self._postings[int(self._offsets[row]):int(self._offsets[row + 1])]
+        return None
+
+    def _weights(self, postings) -> np.ndarray:
+        df = len(postings)
+        idf = math.log(1 + (self._n - df + 0.5) / (df + 0.5))
+        tf = postings["tf"]
+        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * postings["length"] / self._avgdl)
+        return idf * tf * (BM25_K1 + 1) / norm
+
+    def search(self, query: str, k: int, allowed=None):
+        """
+        Top-k (chunk_id, bm25 score) pairs, best first. `allowed(chunk_ids)`
+        optionally returns a mask of the postings a filtered search may use.
+        """
+        hits = [p for p in (self._term_postings(t) for t in set(tokenize(query))) if p is not None]
+        if not hits:
+            return []
+        chunk_ids = np.concatenate([p["chunk_id"] for p in hits])
+        weights = np.concatenate([self._weights(p) for p in hits])
+        if allowed is not None:
+            mask = allowed(chunk_ids)
+            chunk_ids, weights = chunk_ids[mask], weights[mask]
+            if not len(chunk_ids):
+                return []
+        chunk_ids, rows = np.unique(chunk_ids, return_inverse=True)
+        scores = np.bincount(rows, weights=weights)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(chunk_ids[i]), float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = 60):
+    """
+    Fuse ranked chunk ID lists: each list adds 1 / (rrf_k + rank) per ID.
+    Returns the top-k (chunk_id, score) pairs, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])[:k]
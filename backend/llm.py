@@ -1,24 +1,256 @@
 # backend/llm.py
-from ollama import Client
-import torch
+from ollama import AsyncClient
+import asyncio
+import os
+import time
+import weakref
 import json
-import re
 
-# Use phi3:mini for better instruction-following
-client = Client(host="http://localhost:11434")
+from backend.concurrency import AdmissionControl, Overloaded, SingleFlight, run_blocking
+from backend.json_utils import JsonObjectScanner, parse_lenient_json
+from backend.llm_cache import LLMCache, LLM_CACHE_DIGEST_CHECK_INTERVAL, LLM_CACHE_ENABLED
 
-if torch.cuda.is_available():
-    print("⚡ Using GPU")
-else:
-    print("🔧 Using CPU")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# Use phi3 for better instruction-following
+MODEL_NAME = os.getenv("MODEL_NAME", "phi3:latest")
+# Stream generations and hang up as soon as the JSON object closes
+LLM_STREAM_EARLY_STOP = os.getenv("LLM_STREAM_EARLY_STOP", "1") == "1"
+# How long Ollama keeps the model loaded after a request (warmup and every call)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
+# Admission control for Phi-3: generations Ollama runs at once (match its
+# OLLAMA_NUM_PARALLEL), claims allowed to wait beyond those, and the longest
+# queue time worth accepting (below the Streamlit client's 30s timeout)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "20"))
+# Starting guess for seconds per generation, refined by measured calls
+LLM_EXPECTED_SECONDS = float(os.getenv("LLM_EXPECTED_SECONDS", "3"))
 
-def call_phi3(prompt: str, max_retries: int = 2) -> str:
+# httpx connection pools are tied to the loop that opened them, so keep one
+# async client per event loop
+_async_clients = weakref.WeakKeyDictionary()
+
+response_cache = LLMCache()
+_model_digest = ""
+_model_checked_at = None
+
+# Identical prompts in flight at the same time share one Ollama generation
+llm_flight = SingleFlight("llm")
+# Each generation is admitted against Phi-3's capacity; cache hits and
+# coalesced duplicates never reach the model, so they are never refused
+llm_admission = AdmissionControl("llm", LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_MAX_QUEUE_WAIT,
+                                 LLM_EXPECTED_SECONDS)
+
+GENERATION_STATS = {
+    "calls": 0,
+    "early_stops": 0,
+    "tokens_generated": 0,
+    "tokens_budget_unused": 0,  # num_predict minus tokens, for early-stopped calls
+    "generation_seconds": 0.0,
+    "seconds_saved_upper_bound": 0.0,
+}
+
+def get_async_client() -> AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncClient(host=OLLAMA_HOST)
+    return client
+
+
+async def _check_model_digest() -> str:
+    """
+    MODEL_NAME's current digest, re-read from Ollama at most every
+    LLM_CACHE_DIGEST_CHECK_INTERVAL seconds; cached responses for an older
+    digest are purged when it changes.
     """
-    Calls Phi-3 with strict instruction to return only valid JSON.
-    Includes retry logic for better reliability.
+    global _model_digest, _model_checked_at
+    now = time.monotonic()
+    if _model_checked_at is not None and now - _model_checked_at < LLM_CACHE_DIGEST_CHECK_INTERVAL:
+        return _model_digest
+    _model_checked_at = now  # concurrent callers keep the last digest meanwhile
+    try:
+        listing = await get_async_client().list()
+        for m in listing.get("models", []):
+            if MODEL_NAME in (m.get("model"), m.get("name")):
+                digest = m.get("digest") or ""
+                if await run_blocking(response_cache.check_model, MODEL_NAME, digest):
+                    print(f"♻️ {MODEL_NAME} changed, LLM response cache invalidated")
+                _model_digest = digest
+                break
+    except Exception as e:
+        print(f"⚠️ Could not read model digest for cache invalidation: {e}")
+    return _model_digest
+
+
+async def _generate_streaming(full_prompt: str, options: dict) -> str:
     """
+    Stream a generation through JsonObjectScanner and close the stream as soon
+    as the first top-level JSON object is complete; closing the connection
+    makes Ollama stop generating. Returns the text up to the closing brace.
+    """
+    scanner = JsonObjectScanner()
+    parts = []
+    tokens = 0
+    start = time.perf_counter()
+
+    stream = await get_async_client().generate(
+        model=MODEL_NAME,
+        prompt=full_prompt,
+        options=options,
+        stream=True,
+        keep_alive=OLLAMA_KEEP_ALIVE
+    )
+    try:
+        async for chunk in stream:
+            piece = chunk.get('response', '')
+            if piece:
+                tokens += 1  # Ollama streams one token per chunk
+                parts.append(piece)
+                if scanner.feed(piece):
+                    break
+            if chunk.get('done'):
+                break
+    finally:
+        await stream.aclose()
+
+    elapsed = time.perf_counter() - start
+    GENERATION_STATS["calls"] += 1
+    GENERATION_STATS["tokens_generated"] += tokens
+    GENERATION_STATS["generation_seconds"] += elapsed
+
+    text = "".join(parts)
+    if scanner.complete:
+        unused = max(0, options.get("num_predict", tokens) - tokens)
+        # Upper bound: assumes the model would have used its whole num_predict budget
+        saved = unused * elapsed / tokens if tokens else 0.0
+        GENERATION_STATS["early_stops"] += 1
+        GENERATION_STATS["tokens_budget_unused"] += unused
+        GENERATION_STATS["seconds_saved_upper_bound"] += saved
+        print(f"✂️ JSON closed after {tokens} tokens ({elapsed:.2f}s), stopped generation "
+              f"with {unused} tokens of budget left (≤{saved:.2f}s saved)")
+        text = text[:scanner.end]
+    return text
+
+
+async def warm_up_llm() -> float:
+    """
+    Load MODEL_NAME into Ollama ahead of the first query: an empty prompt only
+    loads the model, and keep_alive holds it resident. Returns seconds taken.
+    """
+    start = time.perf_counter()
+    await get_async_client().generate(model=MODEL_NAME, prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+    await _check_model_digest()
+    return time.perf_counter() - start
+
+
+def generation_stats() -> dict:
+    stats = dict(GENERATION_STATS, streaming=LLM_STREAM_EARLY_STOP)
+    calls = stats["calls"]
+    stats["avg_tokens_per_call"] = stats["tokens_generated"] / calls if calls else 0.0
+    return stats
+
+
+def _attempt_request(prompt: str, attempt: int):
+    """Prompt and generation options for a given attempt number."""
+    # Try different approaches based on attempt number
+    if attempt == 0:
+        # First attempt: Direct prompt
+        system_msg = "You are a JSON assistant. Return only valid JSON, no other text."
+        full_prompt = f"{system_msg}\n\n{prompt.strip()}"
+        options = {
+            "temperature": 0.1,
+            "top_p": 0.9,
+            "num_ctx": 2048,
+            "num_predict": 512
+        }
+    else:
+        # Retry attempts: Simpler, more direct
+        full_prompt = f"Return valid JSON only:\n{prompt.strip()}"
+        options = {
+            "temperature": 0.0,
+            "top_p": 0.7,
+            "num_ctx": 1024,
+            "num_predict": 256
+        }
+    return full_prompt, options
+
+
+def _finish_attempt(raw_content: str, attempt: int, max_retries: int):
+    """
+    Parse one raw LLM response.
+    Returns the parsed dict to hand back, or None if another attempt should be made.
+    """
+    print(f"\n📥 RAW LLM RESPONSE (attempt {attempt + 1}):")
+    print(f"Length: {len(raw_content)} chars")
+    print(repr(raw_content)[:200] + ("..." if len(repr(raw_content)) > 200 else ""))
     
+    # Check if response is empty
+    if not raw_content:
+        print(f"❌ Empty response on attempt {attempt + 1}")
+        if attempt < max_retries:
+            return None
+        else:
+            return {"error": "empty_response"}
+
+    # One lenient pass handles fences, unquoted keys/values, trailing commas and truncation
+    parsed = parse_lenient_json(raw_content)
+    if parsed:
+        print(f"✅ Parsed JSON (attempt {attempt + 1}): {parsed}")
+        print("="*60)
+        return parsed
+
+    print(f"❌ No JSON object in response on attempt {attempt + 1}")
+    if attempt < max_retries:
+        return None
+    return {"error": "malformed_json", "raw_content": raw_content[:100]}
+
+
+async def call_phi3_async(prompt: str, max_retries: int = 2) -> dict:
+    """
+    Cached, coalesced front for _generate_json: identical (model, options,
+    prompt) requests are answered from the response cache, and concurrent
+    identical requests share a single Ollama generation.
+    """
+    if not LLM_CACHE_ENABLED:
+        key = LLMCache.make_key(MODEL_NAME, "", _attempt_request(prompt, 0)[1], prompt)
+        return await llm_flight.do(key, _generate_json, prompt, max_retries)
+
+    key = LLMCache.make_key(MODEL_NAME, await _check_model_digest(), _attempt_request(prompt, 0)[1], prompt)
+    # The LRU answers on the loop; only a memory miss goes to SQLite on the CPU executor
+    cached = response_cache.get_memory(key)
+    if cached is None:
+        cached = await run_blocking(response_cache.get, key)
+    if cached is not None:
+        print("⚡ LLM cache hit")
+        return json.loads(cached)
+
+    return await llm_flight.do(key, _generate_and_cache, key, prompt, max_retries)
+
+
+async def _generate_and_cache(key: str, prompt: str, max_retries: int) -> dict:
+    result = await _generate_json(prompt, max_retries)
+    if "error" not in result:
+        await run_blocking(response_cache.put, key, MODEL_NAME, json.dumps(result))
+    return result
+
+
+async def _generate_json(prompt: str, max_retries: int = 2) -> dict:
+    """
+    Calls Phi-3 with strict instruction to return only valid JSON and
+    returns the parsed object (or an {"error": ...} dict).
+    Includes retry logic for better reliability. Uses the async Ollama
+    client, so waiting on the model never blocks the event loop. Is admitted
+    by llm_admission and holds one of its slots for all attempts, so Ollama
+    never queues more than LLM_MAX_CONCURRENCY generations; raises
+    Overloaded when Phi-3 can't take the call on in time.
+    """
+    async with llm_admission.slot():
+        return await _generate_json_attempts(prompt, max_retries)
+
+
+async def _generate_json_attempts(prompt: str, max_retries: int) -> dict:
     for attempt in range(max_retries + 1):
         print(f"\n{'='*60}")
         print(f"📤 ATTEMPT {attempt + 1}: SENDING PROMPT TO LLM")
@@ -27,158 +259,33 @@ def call_phi3(prompt: str, max_retries: int = 2) -> str:
         print("="*60)
 
         try:
-            # Try different approaches based on attempt number
-            if attempt == 0:
-                # First attempt: Direct prompt
-                system_msg = "You are a JSON assistant. Return only valid JSON, no other text."
-                full_prompt = f"{system_msg}\n\n{prompt.strip()}"
-                options = {
-                    "temperature": 0.1,
-                    "top_p": 0.9,
-                    "num_ctx": 2048,
-                    "num_predict": 512
-                }
-            else:
-                # Retry attempts: Simpler, more direct
-                full_prompt = f"Return valid JSON only:\n{prompt.strip()}"
-                options = {
-                    "temperature": 0.0,
-                    "top_p": 0.7,
-                    "num_ctx": 1024,
-                    "num_predict": 256
-                }
-
-            response = client.generate(
-                model="phi3:latest",
-                prompt=full_prompt,
-                options=options
-            )
-            
-            raw_content = response.get('response', '').strip()
-            
-            print(f"\n📥 RAW LLM RESPONSE (attempt {attempt + 1}):")
-            print(f"Length: {len(raw_content)} chars")
-            print(repr(raw_content)[:200] + ("..." if len(repr(raw_content)) > 200 else ""))
-            
-            # Check if response is empty
-            if not raw_content:
-                print(f"❌ Empty response on attempt {attempt + 1}")
-                if attempt < max_retries:
-                    continue
-                else:
-                    return '{"error": "empty_response"}'
-
-            # Clean the response
-            content = clean_llm_response(raw_content)
-
-            print(f"\n📥 CLEANED RESPONSE (attempt {attempt + 1}):")
-            print(f"Length: {len(content)} chars")
-            print(content)
-            print("="*60)
-
-            # Validate it's proper JSON
-            if content:
-                try:
-                    json.loads(content)
-                    print("✅ Valid JSON confirmed")
-                    return content
-                except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON on attempt {attempt + 1}: {e}")
-                    if attempt < max_retries:
-                        continue
-                    else:
-                        # Try to fix common issues one more time
-                        fixed_content = emergency_json_fix(content)
-                        try:
-                            json.loads(fixed_content)
-                            print("✅ Emergency fix successful")
-                            return fixed_content
-                        except:
-                            return content  # Return anyway for further processing
+            full_prompt, options = _attempt_request(prompt, attempt)
+            if LLM_STREAM_EARLY_STOP:
+                raw_content = (await _generate_streaming(full_prompt, options)).strip()
             else:
-                print(f"❌ Cleaned content is empty on attempt {attempt + 1}")
-                if attempt < max_retries:
-                    continue
+                response = await get_async_client().generate(
+                    model=MODEL_NAME,
+                    prompt=full_prompt,
+                    options=options,
+                    keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                raw_content = response.get('response', '').strip()
+            result = _finish_attempt(raw_content, attempt, max_retries)
+            if result is not None:
+                return result
 
         except Exception as e:
             print(f"❌ LLM Request Failed on attempt {attempt + 1}: {str(e)}")
             if attempt == max_retries:
-                return '{"error": "llm_failed"}'
+                return {"error": "llm_failed"}
             continue
 
-    return '{"error": "all_attempts_failed"}'
+    return {"error": "all_attempts_failed"}
 
 
-def clean_llm_response(response: str) -> str:
-    """Clean and fix common issues in LLM responses"""
-    
-    # Remove markdown and noise
-    response = re.sub(r'```json|```', '', response, flags=re.IGNORECASE)
-    response = re.sub(r'(?i)(end of document|thank you|system:|assistant:|here is|here\'s)', '', response)
-    
-    # Remove leading/trailing whitespace and newlines
-    response = response.strip()
-    
-    # Fix common JSON issues
-    # Fix malformed numbers like 00.95 → 0.95
-    response = re.sub(r':\s*0+(\d+\.\d+)', r': \1', response)
-    response = re.sub(r':\s*0+(\d+)(?!\d)', r': \1', response)
-    
-    # Fix unquoted keys
-    response = re.sub(r'([a-zA-Z_]\w*)\s*:', r'"\1":', response)
-    
-    # Fix trailing commas
-    response = re.sub(r',(\s*[}\]])', r'\1', response)
-    
-    # Ensure proper string quoting for common values
-    response = re.sub(r':\s*approved(?![a-zA-Z])', ': "approved"', response)
-    response = re.sub(r':\s*rejected(?![a-zA-Z])', ': "rejected"', response)
-    response = re.sub(r':\s*conditional(?![a-zA-Z])', ': "conditional"', response)
-    response = re.sub(r':\s*male(?![a-zA-Z])', ': "male"', response)
-    response = re.sub(r':\s*female(?![a-zA-Z])', ': "female"', response)
-    
-    # Fix "Up to Sum Insured" which might be unquoted
-    response = re.sub(r':\s*Up to Sum Insured', ': "Up to Sum Insured"', response)
-    
-    # If response doesn't start with {, try to find and extract JSON
-    if not response.startswith('{'):
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            response = json_match.group(0)
-    
-    # Handle truncated JSON - if it's cut off, try to close it properly
-    if response.startswith('{') and not response.endswith('}'):
-        # Count unclosed braces and brackets
-        open_braces = response.count('{') - response.count('}')
-        open_brackets = response.count('[') - response.count(']')
-        
-        # Add missing closing characters
-        response += ']' * open_brackets + '}' * open_braces
-    
-    return response
-
-
-def emergency_json_fix(content: str) -> str:
-    """Last resort JSON fixing for malformed responses"""
-    if not content.strip():
-        return '{"error": "empty_content"}'
-    
-    # If it looks like truncated JSON, try to complete it
-    if content.startswith('{') and not content.endswith('}'):
-        # Count unmatched braces
-        open_count = content.count('{')
-        close_count = content.count('}')
-        
-        if open_count > close_count:
-            # Add missing closing braces
-            content += '}' * (open_count - close_count)
-    
-    # If still not valid, create a simple error JSON
-    try:
-        json.loads(content)
-        return content
-    except:
-        return '{"error": "malformed_json", "raw_content": "' + content.replace('"', '\\"')[:100] + '"}'
+def call_phi3(prompt: str, max_retries: int = 2) -> dict:
+    """Blocking wrapper around call_phi3_async for scripts and quick tests."""
+    return asyncio.run(call_phi3_async(prompt, max_retries))
 
 
 def test_llm_json_extraction():
@@ -195,8 +302,9 @@ Return JSON:
 """
     
     try:
-        result = call_phi3(test_prompt)
-        parsed = json.loads(result)
+        parsed = call_phi3(test_prompt)
+        if "error" in parsed:
+            raise ValueError(parsed["error"])
         print(f"✅ Test successful: {parsed}")
         return True
     except Exception as e:
@@ -204,11 +312,12 @@ Return JSON:
         return False
 
 
-def get_simple_llm_response(prompt: str) -> dict:
+async def get_simple_llm_response(prompt: str) -> dict:
     """Simplified LLM call with guaranteed JSON response"""
     try:
-        response = call_phi3(prompt)
-        return json.loads(response)
+        return await call_phi3_async(prompt)
+    except Overloaded:
+        raise
     except Exception as e:
         print(f"❌ LLM call failed: {e}")
         return {"error": str(e), "fallback": True}
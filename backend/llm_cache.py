@@ -0,0 +1,139 @@
+# backend/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_PATH = "data/llm_cache.sqlite3"
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+# How often a running server re-reads the model digest that cache keys include
+LLM_CACHE_DIGEST_CHECK_INTERVAL = float(os.getenv("LLM_CACHE_DIGEST_CHECK_INTERVAL", "60"))  # seconds
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join(prompt.split())
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM responses: an in-memory LRU in front of SQLite.
+    Entries expire after `ttl` seconds. Keys include the model digest, so a
+    re-pulled tag stops hitting old entries, and check_model drops a model's
+    entries from disk once its digest changes. `get_memory` only touches the
+    LRU; the methods that reach SQLite block and belong off the event loop.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # key -> (response, expires_at)
+        self._db = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, expires_at REAL)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, digest TEXT)")
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def make_key(model: str, digest: str, options: dict, prompt: str) -> str:
+        payload = json.dumps(
+            {"model": model, "digest": digest, "options": options, "prompt": normalize_prompt(prompt)},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_memory(self, key: str):
+        """The response from the in-memory tier, or None (a miss is not counted: `get` follows)."""
+        with self._lock:
+            return self._get_memory(key, time.time())
+
+    def _get_memory(self, key: str, now: float):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._memory[key]
+        return None
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            cached = self._get_memory(key, now)
+            if cached is not None:
+                return cached
+
+            row = self._conn().execute(
+                "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, expires_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, expires_at),
+            )
+            db.commit()
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def check_model(self, model: str, digest: str) -> bool:
+        """Record the model's current digest; purge its entries if it changed. Returns True on purge."""
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT digest FROM models WHERE model = ?", (model,)).fetchone()
+            changed = row is not None and row[0] != digest
+            if changed:
+                db.execute("DELETE FROM responses WHERE model = ?", (model,))
+                # Memory entries don't record their model, so start that tier over
+                self._memory.clear()
+            db.execute("INSERT OR REPLACE INTO models (model, digest) VALUES (?, ?)", (model, digest))
+            db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+        return changed
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
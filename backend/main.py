@@ -1,8 +1,26 @@
 # backend/main.py
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, File, UploadFile
+from fastapi.responses import JSONResponse
 import os
 
-app = FastAPI(title="PolicyMind API", version="1.0")
+from backend.concurrency import run_blocking
+from backend.startup import readiness, start_warmup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from backend.ingest_jobs import ingest_jobs
+
+    # Jobs left unfinished by a previous server process would otherwise poll as queued forever
+    await run_blocking(ingest_jobs.recover_interrupted)
+    # Models load in the background so the server accepts connections at once
+    tasks = start_warmup()
+    yield
+    for task in tasks:
+        task.cancel()
+
+app = FastAPI(title="PolicyMind API", version="1.0", lifespan=lifespan)
 
 # Import the router from routes.py
 from backend.routes import router
@@ -10,25 +28,61 @@ from backend.routes import router
 # Include the router
 app.include_router(router)
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop is responsive."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the embedder (and, by default, Phi-3) are loaded."""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 @app.post("/upload/")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), tenant: Optional[str] = None):
     ext = os.path.splitext(file.filename)[1].lower()
     if ext != ".pdf":
         return {"error": "Only PDF files are supported."}
 
-    file_path = f"data/uploaded_docs/{file.filename}"
-    os.makedirs("data/uploaded_docs", exist_ok=True)
+    try:
+        from backend.ingest_jobs import ingest_jobs, stage_upload
+        from backend.tenants import tenant_name
+
+        tenant = tenant_name(tenant)  # reject a bad tenant before staging the upload
+        # Streamed to disk in fixed-size reads; parsing and indexing run on the ingest worker
+        staged_path, digest = await stage_upload(file)
+        job = ingest_jobs.submit(staged_path, os.path.basename(file.filename), digest, tenant)
+
+        status = "duplicate" if job["status"] == "duplicate" else "accepted"
+        return {"status": status, "job_id": job["job_id"], "job": job}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    from backend.ingest_jobs import ingest_jobs
 
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Job {job_id} not found."}
+    return job
 
+@app.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, tenant: Optional[str] = None):
     try:
-        from backend.document_processor import save_and_process_pdf
-        from backend.vector_store import build_faiss_index
+        from backend.document_processor import remove_document
+        from backend.vector_store import remove_document_index
+        from backend.ingest_jobs import ingest_jobs
+        from backend.tenants import TenantPaths
 
-        save_and_process_pdf(file_path)
-        build_faiss_index()
+        paths = TenantPaths(tenant)
+        if not remove_document(doc_id, paths.chunks_dir):
+            return {"status": "error", "message": f"Document {doc_id} not found."}
+        await run_blocking(remove_document_index, doc_id, paths.tenant)
+        # The same content may be uploaded again once it is gone
+        ingest_jobs.hashes(paths.tenant).forget(doc_id)
 
-        return {"status": "success", "message": "Document processed and indexed."}
+        return {"status": "success", "message": f"Document {doc_id} removed from index."}
     except Exception as e:
         return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -1,14 +1,115 @@
 # backend/routes.py
-from fastapi import APIRouter
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from backend.pipeline import run_pipeline
+from starlette.background import BackgroundTask
+from backend.concurrency import Overloaded
+from backend.pipeline import (
+    run_pipeline_async, run_pipeline_batch, run_pipeline_stream, parse_stats, context_stats, overloaded_result,
+    pipeline_flight,
+)
+from backend.llm import response_cache, generation_stats, llm_admission, llm_flight
+from backend.ingest_jobs import ingest_jobs
+from backend.search_filters import SearchFilter
+from backend.tenants import tenant_name
+from backend.vector_store import query_embedding_stats, search_stats, tenant_stats
 
 router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
+    doc_id: Optional[str] = None  # restrict clauses to this policy document
+    tenant: Optional[str] = None  # whose documents to search; the default tenant if omitted
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    doc_id: Optional[str] = None
+    tenant: Optional[str] = None
+
+def _filters(payload) -> Optional[SearchFilter]:
+    return SearchFilter(doc_id=payload.doc_id) if payload.doc_id else None
+
+def _tenant(payload) -> str:
+    try:
+        return tenant_name(payload.tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _overloaded(e: Overloaded) -> JSONResponse:
+    """429 for claims Phi-3 can't take on in time; clients should back off for Retry-After seconds."""
+    return JSONResponse(
+        {"status": "error", "message": str(e), "reason": e.reason, "retry_after": e.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 @router.post("/query")
 async def query_handler(payload: QueryRequest):
-    result = run_pipeline(payload.query)
-    return result
\ No newline at end of file
+    tenant = _tenant(payload)
+    try:
+        result = await run_pipeline_async(payload.query, _filters(payload), tenant)
+    except Overloaded as e:
+        return _overloaded(e)
+    return result
+
+@router.post("/query/stream")
+async def stream_query_handler(payload: QueryRequest):
+    """
+    Server-Sent Events: one event per pipeline stage, ending with `final` or
+    `error`. The first stage runs before the response starts, so a claim
+    Phi-3 can't parse in time gets a 429; later refusals end the stream
+    with an `error` event carrying `retry_after`.
+    """
+    stream = run_pipeline_stream(payload.query, _filters(payload), _tenant(payload))
+    try:
+        first = await stream.__anext__()
+    except Overloaded as e:
+        await stream.aclose()
+        return _overloaded(e)
+
+    def encode(event, data):
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def events():
+        yield encode(*first)
+        try:
+            async for event, data in stream:
+                yield encode(event, data)
+        except Overloaded as e:
+            yield encode("error", overloaded_result(e))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(stream.aclose),  # also when the client left before streaming began
+    )
+
+@router.post("/query/batch")
+async def batch_query_handler(payload: BatchQueryRequest):
+    """Claims Phi-3 refuses get an error result with `retry_after`; a 429 only if every claim was refused."""
+    results = await run_pipeline_batch(payload.queries, _filters(payload), _tenant(payload))
+    refused = [r["retry_after"] for r in results if "retry_after" in r]
+    if results and len(refused) == len(results):
+        return JSONResponse({"results": results}, status_code=429, headers={"Retry-After": str(min(refused))})
+    return {"results": results}
+
+@router.get("/metrics")
+async def metrics_handler():
+    return {
+        "llm_cache": response_cache.stats(),
+        "query_parsing": parse_stats(),
+        "clause_context": context_stats(),
+        "llm_generation": generation_stats(),
+        "llm_admission": llm_admission.stats(),
+        "single_flight": {
+            "pipeline": pipeline_flight.stats(),
+            "llm": llm_flight.stats(),
+        },
+        "ingest": ingest_jobs.stats(),
+        "search": search_stats(),
+        "query_embedding": query_embedding_stats(),
+        "tenants": tenant_stats(),
+    }
\ No newline at end of file
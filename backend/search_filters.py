@@ -0,0 +1,99 @@
+# backend/search_filters.py
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from backend.document_processor import doc_id_range, normalize_clause_id
+
+
+def normalize_section(section: str) -> str:
+    return " ".join(section.lower().split())
+
+
+class SearchFilter:
+    """
+    Restricts a search to chunks matching every given field: one or more
+    documents, a clause ID prefix (e.g. "Code-Excl") and/or a section heading
+    (case-insensitive). Empty fields don't filter.
+    """
+
+    def __init__(self, doc_id=None, clause_prefix: str = None, section: str = None):
+        self.doc_id = doc_id  # one document ID or a list of them
+        self.clause_prefix = clause_prefix
+        self.section = section
+
+    def doc_ids(self):
+        if not self.doc_id:
+            return ()
+        return (self.doc_id,) if isinstance(self.doc_id, str) else tuple(self.doc_id)
+
+    def __bool__(self):
+        return bool(self.doc_ids() or self.clause_prefix or self.section)
+
+    def key(self):
+        """Hashable form, for coalescing identical requests."""
+        return (tuple(sorted(self.doc_ids())), self.clause_prefix, self.section)
+
+    def resolve(self, clauses, sections) -> "ResolvedFilter":
+        """
+        Turn the filter into chunk ID constraints using a generation's clause
+        and section maps (KeyIndex). Documents own contiguous ID ranges, so they need no
+        lookup; clause prefixes and sections become explicit ID sets.
+        """
+        ranges = [doc_id_range(d) for d in self.doc_ids()]
+        ids = None
+        if self.clause_prefix:
+            prefix = normalize_clause_id(self.clause_prefix) or ""
+            ids = np.unique(clauses.with_prefix(prefix))
+        if self.section:
+            section_ids = np.unique(sections.get(normalize_section(self.section)))
+            ids = section_ids if ids is None else np.intersect1d(ids, section_ids)
+        if ids is not None and ranges:
+            ids = ids[_in_ranges(ids, ranges)]
+            ranges = []
+        return ResolvedFilter(ranges, ids)
+
+
+def _in_ranges(ids: np.ndarray, ranges) -> np.ndarray:
+    mask = np.zeros(len(ids), dtype=bool)
+    for start, end in ranges:
+        mask |= (ids >= start) & (ids < end)
+    return mask
+
+
+class ResolvedFilter:
+    """
+    Chunk ID constraint for one generation: either half-open ID ranges (whole
+    documents) or an explicit sorted ID set. Applied inside FAISS through an
+    ID selector and to lexical postings through `mask`.
+    """
+
+    def __init__(self, ranges, ids: Optional[np.ndarray]):
+        self.ranges = ranges
+        self.ids = ids
+        self._selector = None
+
+    def matches_nothing(self) -> bool:
+        return self.ids is not None and len(self.ids) == 0
+
+    def mask(self, chunk_ids: np.ndarray) -> np.ndarray:
+        if self.ids is not None:
+            return np.isin(chunk_ids, self.ids)
+        return _in_ranges(chunk_ids, self.ranges)
+
+    def selector(self):
+        """FAISS ID selector; cached, and sub-selectors are kept alive alongside it."""
+        if self._selector is None:
+            if self.ids is not None:
+                parts = [faiss.IDSelectorBatch(len(self.ids), faiss.swig_ptr(self.ids))]
+            else:
+                parts = [faiss.IDSelectorRange(start, end) for start, end in self.ranges]
+            selector = parts[0]
+            chain = list(parts)
+            for part in parts[1:]:
+                selector = faiss.IDSelectorOr(selector, part)
+                chain.append(selector)
+            self._chain = chain  # SWIG selectors don't own the ones they wrap
+            self._selector = selector
+        return self._selector
@@ -0,0 +1,94 @@
+# backend/startup.py
+import asyncio
+import os
+import time
+
+from backend.concurrency import run_blocking
+
+# Seconds between Phi-3 warmup attempts while Ollama is unreachable
+LLM_WARMUP_RETRY = float(os.getenv("LLM_WARMUP_RETRY", "10"))
+# Whether /readyz waits for Phi-3 to be loaded, not just the embedder
+READY_REQUIRES_LLM = os.getenv("READY_REQUIRES_LLM", "1") == "1"
+
+_started_at = time.monotonic()
+
+
+class Readiness:
+    """
+    Startup state of each component: "pending", "ready" or "error". The
+    process serves /healthz immediately; /readyz turns ready once the
+    required components are.
+    """
+
+    def __init__(self, required):
+        self.required = tuple(required)
+        self.components = {}
+
+    def set(self, name: str, status: str, **details):
+        self.components[name] = dict(details, status=status,
+                                     at_seconds=round(time.monotonic() - _started_at, 3))
+
+    def ready(self) -> bool:
+        return all(self.components.get(name, {}).get("status") == "ready" for name in self.required)
+
+    def report(self) -> dict:
+        return {"ready": self.ready(), "required": list(self.required), "components": dict(self.components)}
+
+
+readiness = Readiness(("embedder", "llm") if READY_REQUIRES_LLM else ("embedder",))
+
+
+def _load_embedder() -> float:
+    from backend.vector_store import get_embedder
+
+    start = time.perf_counter()
+    get_embedder().encode(["warmup"])  # first encode pays lazy kernel/tokenizer setup
+    return time.perf_counter() - start
+
+
+def _load_index() -> int:
+    from backend.vector_store import index_holder
+
+    return index_holder.snapshot()[1].ntotal
+
+
+async def _warm_embedder():
+    readiness.set("embedder", "pending")
+    try:
+        seconds = await run_blocking(_load_embedder)
+        readiness.set("embedder", "ready", load_seconds=round(seconds, 3))
+    except Exception as e:
+        readiness.set("embedder", "error", message=str(e))
+        print(f"❌ Embedder failed to load: {e}")
+        return
+
+    # Not required: with no index yet, uploads still work and build one
+    try:
+        vectors = await run_blocking(_load_index)
+        readiness.set("index", "ready", vectors=vectors)
+    except FileNotFoundError as e:
+        readiness.set("index", "error", message=str(e))
+    except Exception as e:
+        readiness.set("index", "error", message=str(e))
+        print(f"⚠️ Index failed to load: {e}")
+
+
+async def _warm_llm():
+    from backend.llm import MODEL_NAME, warm_up_llm
+
+    readiness.set("llm", "pending", model=MODEL_NAME)
+    while True:
+        try:
+            seconds = await warm_up_llm()
+            readiness.set("llm", "ready", model=MODEL_NAME, load_seconds=round(seconds, 3))
+            print(f"🔥 {MODEL_NAME} warmed up in {seconds:.1f}s")
+            return
+        except Exception as e:
+            readiness.set("llm", "error", model=MODEL_NAME, message=str(e))
+            print(f"⚠️ {MODEL_NAME} warmup failed, retrying in {LLM_WARMUP_RETRY:.0f}s: {e}")
+            await asyncio.sleep(LLM_WARMUP_RETRY)
+
+
+def start_warmup():
+    """Schedule embedder/index loading and Phi-3 warmup; returns the tasks."""
+    return [asyncio.create_task(_warm_embedder()), asyncio.create_task(_warm_llm())]
@@ -0,0 +1,96 @@
+# backend/tenants.py
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# The default tenant keeps the original single-tenant layout under data/, so
+# existing deployments need no migration; every other tenant gets its own
+# namespace under TENANTS_DIR.
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+TENANTS_DIR = "data/tenants"
+# How many non-default tenant indexes stay resident; the least recently
+# queried one is dropped beyond that and reloaded from disk on its next query
+MAX_RESIDENT_TENANTS = int(os.getenv("MAX_RESIDENT_TENANTS", "8"))
+
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def tenant_name(tenant: str = None) -> str:
+    """Validated tenant key; None or "" means the default tenant."""
+    if not tenant:
+        return DEFAULT_TENANT
+    tenant = tenant.strip().lower()
+    if not TENANT_PATTERN.match(tenant):
+        raise ValueError(f"Invalid tenant {tenant!r}: use 1-64 lowercase letters, digits, '-' or '_'")
+    return tenant
+
+
+class TenantPaths:
+    """Where one tenant's uploads, chunk store, index generations and upload hashes live."""
+
+    def __init__(self, tenant: str = None):
+        self.tenant = tenant_name(tenant)
+        if self.tenant == DEFAULT_TENANT:
+            root = "data"
+        else:
+            root = os.path.join(TENANTS_DIR, self.tenant)
+        self.root = root
+        self.upload_dir = os.path.join(root, "uploaded_docs")
+        self.chunks_dir = os.path.join(root, "chunks")
+        self.index_dir = os.path.join(root, "index")
+        self.hashes_path = os.path.join(root, "content_hashes.json")
+
+
+def known_tenants():
+    """Every tenant with a namespace on disk, default first."""
+    tenants = [DEFAULT_TENANT]
+    if os.path.isdir(TENANTS_DIR):
+        tenants += sorted(name for name in os.listdir(TENANTS_DIR)
+                          if TENANT_PATTERN.match(name) and name != DEFAULT_TENANT)
+    return tenants
+
+
+class TenantRegistry:
+    """
+    One lazily created object per tenant (e.g. its index holder), with an LRU
+    bound on how many non-default tenants are kept. `create(tenant)` builds a
+    missing entry; creation is cheap, loading happens on first use. Evicted
+    entries are only dropped here: requests already holding one finish
+    normally and its memory is freed after them.
+    """
+
+    def __init__(self, create, max_resident: int = MAX_RESIDENT_TENANTS, pinned=None):
+        self.create = create
+        self.max_resident = max(1, max_resident)
+        self.pinned = pinned  # the default tenant's entry, never evicted
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant: str = None):
+        tenant = tenant_name(tenant)
+        if tenant == DEFAULT_TENANT and self.pinned is not None:
+            return self.pinned
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None:
+                self._entries.move_to_end(tenant)
+                return entry
+            entry = self._entries[tenant] = self.create(tenant)
+            self.loads += 1
+            while len(self._entries) > self.max_resident:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                print(f"💤 Evicted tenant {evicted} from memory")
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resident": list(self._entries),
+                "max_resident": self.max_resident,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -1,52 +1,726 @@
 # backend/vector_store.py
 import json
 import os
-import pickle
+import threading
+import time
+from contextlib import contextmanager
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 
+from backend.ann_index import (
+    FAISS_MMAP, apply_search_params, build_index, filtered_search_params, index_params, read_index, rerank,
+    rerank_factor, supports_remove,
+)
+from backend.chunk_store import ChunkTable
+from backend.concurrency import cpu_executor, interprocess_lock, run_blocking
+from backend.document_processor import (
+    CHUNK_ORDINAL_BITS, CHUNKS_DIR, assign_chunk_ids, doc_id_range, iter_documents, normalize_clause_id,
+)
+from backend.search_filters import SearchFilter, normalize_section
+from backend.tenants import DEFAULT_TENANT, TenantPaths, TenantRegistry, tenant_name
+from backend.embedder import Embedder, load_embedder
+from backend.embedding_batcher import EMBED_BATCHING, EmbeddingBatcher
+from backend.embedding_cache import EmbeddingCache
+from backend.key_index import KeyIndex, KeyIndexBuilder, key_index_paths
+from backend.lexical_index import (
+    LexicalIndex, LexicalIndexBuilder, has_clause_code, lexical_paths, reciprocal_rank_fusion,
+)
+
+# Legacy single-file chunk dump, only used when the per-document store is empty
 DATA_PATH = "data/parsed_output.json"
-FAISS_INDEX_PATH = "data/faiss.index"
-METADATA_PATH = "data/metadata.pkl"
+INDEX_DIR = "data/index"
+GENERATION_PATH = os.path.join(INDEX_DIR, "CURRENT")
+
+# How often (seconds) a resident index checks for a newer generation on disk
+RELOAD_CHECK_INTERVAL = float(os.getenv("INDEX_RELOAD_CHECK_INTERVAL", "1.0"))
+
+# vector = dense only; lexical = BM25 only (no embedder); hybrid = reciprocal
+# rank fusion of both, answered lexically when the query has exact terms
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+# Each ranking feeds HYBRID_DEPTH * k candidates into the fusion
+HYBRID_DEPTH = int(os.getenv("HYBRID_DEPTH", "4"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Resolved search filters (and their FAISS selectors) kept per index holder
+RESOLVED_FILTER_CACHE = 256
+
+_embedder = None
+_embedder_lock = threading.Lock()
+_build_lock = threading.RLock()
+_locked_index_dirs = set()  # index dirs whose cross-process writer lock this process holds
+
+
+def get_embedder() -> Embedder:
+    """
+    The configured embedding backend (EMBEDDER_BACKEND), loaded on first use.
+    Backends import their runtimes lazily, so importing this module stays cheap.
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                embedder = load_embedder()
+                print(f"⚡ Embedding with {embedder.name} on GPU" if embedder.device == "cuda"
+                      else f"🔧 Embedding with {embedder.name} on CPU")
+                _embedder = embedder
+    return _embedder
+
+
+def generation_paths(generation: int, index_dir: str = INDEX_DIR):
+    """Return (index_path, chunk_index_path, chunk_blob_path) for one index generation."""
+    return (
+        os.path.join(index_dir, f"faiss.{generation}.index"),
+        os.path.join(index_dir, f"chunks.{generation}.idx"),
+        os.path.join(index_dir, f"chunks.{generation}.blob"),
+    )
+
+
+def generation_params_path(generation: int, index_dir: str = INDEX_DIR):
+    """Index type and build/search parameters recorded for one generation."""
+    return os.path.join(index_dir, f"params.{generation}.json")
+
+
+def read_generation(generation_path: str = GENERATION_PATH) -> int:
+    """Current index generation on disk, or 0 if no index has been built."""
+    try:
+        with open(generation_path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+@contextmanager
+def _index_writer(index_dir: str):
+    """
+    Serialize index writers: threads of this process through _build_lock,
+    other processes (uvicorn workers) through a file lock in `index_dir`.
+    Reentrant, so a rebuild can run inside an update.
+    """
+    with _build_lock:
+        if index_dir in _locked_index_dirs:
+            yield
+            return
+        with interprocess_lock(os.path.join(index_dir, "WRITE_LOCK")):
+            _locked_index_dirs.add(index_dir)
+            try:
+                yield
+            finally:
+                _locked_index_dirs.discard(index_dir)
+
+
+def write_index_generation(index, chunk_records, index_dir: str = INDEX_DIR, params: dict = None,
+                           base=None, replaced=None) -> int:
+    """
+    Persist index + chunk table + BM25 lexical index + clause ID and section
+    indexes as a new generation and publish it. `chunk_records` is an iterable of (chunk_id, chunk) in
+    ascending ID order; it is streamed to disk, never held in memory as a
+    whole (only term postings and clause IDs are, while their indexes are built).
+    With `base`, the snapshot an update starts from, `chunk_records` are only
+    the chunks replacing the `replaced` ID range: base's other chunk records
+    are copied over in bulk, and only the new chunks are tokenized, their
+    postings and clause/section entries merged into base's, so an update
+    never decodes the corpus.
+    Files are written under generation-stamped names first and the CURRENT
+    pointer is swapped last, so readers never see a half-written generation.
+    """
+    generation_path = os.path.join(index_dir, "CURRENT")
+    with _index_writer(index_dir):
+        generation = read_generation(generation_path) + 1
+        index_path, chunk_index_path, chunk_blob_path = generation_paths(generation, index_dir)
+
+        faiss.write_index(index, index_path)
+        lexical = LexicalIndexBuilder()
+        clauses, sections = KeyIndexBuilder(), KeyIndexBuilder()
+
+        def indexed_records():
+            for chunk_id, chunk in chunk_records:
+                fields = json.loads(bytes(chunk)) if isinstance(chunk, (bytes, memoryview)) else chunk
+                lexical.add(chunk_id, fields.get("text", ""))
+                clause_key = normalize_clause_id(fields.get("clause_id"))
+                if clause_key:
+                    clauses.add(clause_key, chunk_id)
+                if fields.get("section"):
+                    sections.add(normalize_section(fields["section"]), chunk_id)
+                yield chunk_id, chunk
+
+        table_base, lexical_base, clause_base, section_base = (
+            (base[2],) + base[4:7] if base is not None else (None, None, None, None)
+        )
+        ChunkTable.write(chunk_index_path, chunk_blob_path, indexed_records(), base=table_base, replaced=replaced)
+        lexical.write(*lexical_paths(generation, index_dir), base=lexical_base, replaced=replaced)
+        clauses.write(*key_index_paths("clause", generation, index_dir), base=clause_base, replaced=replaced)
+        sections.write(*key_index_paths("section", generation, index_dir), base=section_base, replaced=replaced)
+        if params is not None:
+            with open(generation_params_path(generation, index_dir), "w", encoding="utf-8") as f:
+                json.dump(params, f, indent=2)
+
+        tmp_path = generation_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(generation))
+        os.replace(tmp_path, generation_path)
+
+        _prune_generations(index_dir, keep_from=generation - 1)
+    return generation
+
+
+_GENERATION_FILES = ("faiss", "chunks", "params", "lexterms", "lexoffsets", "lexpostings", "lexlengths",
+                     "clausekeys", "clauseoffsets", "clauseids", "sectionkeys", "sectionoffsets", "sectionids")
+
+
+def _prune_generations(index_dir: str, keep_from: int):
+    """
+    Delete index files older than `keep_from` (the previous generation is
+    kept). Processes still mapping a deleted generation keep reading it until
+    they swap; the space is freed once the last one unmaps it.
+    """
+    for name in os.listdir(index_dir):
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] in _GENERATION_FILES and parts[1].isdigit():
+            if int(parts[1]) < keep_from:
+                try:
+                    os.remove(os.path.join(index_dir, name))
+                except OSError:
+                    pass
+
+
+class IndexHolder:
+    """
+    Process-resident FAISS index and chunk metadata.
+    Loads once, serves every search from memory and swaps in a new generation
+    when build_faiss_index publishes one. Searches always run against an
+    immutable snapshot, so a reload never blocks in-flight queries.
+
+    Every file of a generation is memory-mapped (the FAISS index too, with
+    FAISS_MMAP), so workers serving the same generation share one copy in
+    the page cache. Workers converge on a new generation by polling CURRENT.
+
+    For compressed (fp16/int8/PQ) indexes, `exact_lookup(texts)` supplies
+    float32 vectors for re-ranking the top candidates.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR, exact_lookup=None):
+        self.index_dir = index_dir
+        self.exact_lookup = exact_lookup
+        self.generation_path = os.path.join(index_dir, "CURRENT")
+        self._snapshot = None  # (generation, index, metadata, params, lexical, clauses, sections)
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._resolved = {}  # (generation, filter key) -> ResolvedFilter
+
+    def _open_tables(self, generation: int):
+        """
+        Open a generation's chunk table, lexical index and clause ID / section
+        maps. All are memory-mapped: nothing is read until a search asks.
+        """
+        _, chunk_index_path, chunk_blob_path = generation_paths(generation, self.index_dir)
+        metadata = ChunkTable(chunk_index_path, chunk_blob_path)
+        lexical_files = lexical_paths(generation, self.index_dir)
+        # Generations written before the lexical index can only be searched densely
+        lexical = LexicalIndex(*lexical_files) if os.path.exists(lexical_files[0]) else None
+        clauses, sections = (KeyIndex.open(*key_index_paths(name, generation, self.index_dir))
+                             for name in ("clause", "section"))
+        return metadata, lexical, clauses, sections
+
+    def _load(self, generation: int):
+        try:
+            with open(generation_params_path(generation, self.index_dir), "r", encoding="utf-8") as f:
+                params = json.load(f)
+        except FileNotFoundError:
+            params = {}  # generations written before index types were configurable are flat
+        index = read_index(generation_paths(generation, self.index_dir)[0], params)
+        metadata, lexical, clauses, sections = self._open_tables(generation)
+        apply_search_params(index, params)
+        return (generation, index, metadata, params, lexical, clauses, sections)
+
+    def snapshot(self):
+        """Return the current (generation, index, metadata, params, lexical, clauses, sections), reloading if stale."""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return snapshot
+
+        # Only the first load waits; later reloads are skipped while another
+        # thread is already loading, and the old snapshot keeps serving.
+        if not self._reload_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            self._last_check = now
+            snapshot = self._refresh()
+            if snapshot is None:
+                raise FileNotFoundError("FAISS index not found. Run build_faiss_index first.")
+            return snapshot
+        finally:
+            self._reload_lock.release()
+
+    def _refresh(self):
+        """
+        Swap to the generation CURRENT names (caller holds _reload_lock).
+        Another process may publish twice and prune the generation we just
+        read before we open it; then the newer one is loaded instead.
+        """
+        for _ in range(3):
+            generation = read_generation(self.generation_path)
+            if generation == 0:
+                return self._snapshot
+            if self._snapshot is not None and self._snapshot[0] == generation:
+                return self._snapshot
+            try:
+                self._snapshot = self._load(generation)
+            except (FileNotFoundError, RuntimeError):
+                # FAISS reports a pruned index file as a RuntimeError, not FileNotFoundError
+                if read_generation(self.generation_path) == generation:
+                    raise
+                continue
+            print(f"🔄 Loaded index generation {generation} ({self._snapshot[1].ntotal} vectors, pid {os.getpid()})")
+            return self._snapshot
+        raise RuntimeError(f"Index generations in {self.index_dir} changed faster than they could be loaded")
+
+    def latest(self):
+        """Force a generation check (used by writers); None if no index exists yet."""
+        with self._reload_lock:
+            self._last_check = time.monotonic()
+            return self._refresh()
+
+    def generation(self) -> int:
+        """Generation this process is serving (0 until the first load)."""
+        snapshot = self._snapshot
+        return snapshot[0] if snapshot is not None else 0
+
+    def publish(self, generation: int, index, params: dict):
+        """
+        Adopt a generation this process just wrote. Without FAISS_MMAP the
+        in-memory index is kept, skipping the reload; with it the file is
+        mapped instead, so the writer shares pages with the other workers too.
+        """
+        with self._reload_lock:
+            if self._snapshot is None or self._snapshot[0] < generation:
+                if FAISS_MMAP:
+                    self._snapshot = self._load(generation)
+                    return
+                metadata, lexical, clauses, sections = self._open_tables(generation)
+                self._snapshot = (generation, index, metadata, params, lexical, clauses, sections)
+
+    def _vector_hits(self, snapshot, query_vecs, k: int, restrict=None):
+        """
+        (chunk_id, distance) lists per query row, best first. `restrict` (a
+        ResolvedFilter) is applied inside FAISS through an ID selector.
+        """
+        _, index, metadata, params = snapshot[:4]
+        query_vecs = np.asarray(query_vecs, dtype="float32")
+        search_kwargs = {}
+        if restrict is not None:
+            search_kwargs["params"] = filtered_search_params(params, restrict.selector())
+
+        factor = rerank_factor(params) if self.exact_lookup is not None else 0
+        if factor > 1:
+            distances, indices = index.search(query_vecs, k * factor, **search_kwargs)
+            distances, indices = rerank(
+                query_vecs, distances, indices,
+                lambda ids: self.exact_lookup([metadata.get(int(i), {}).get("text", "") for i in ids]),
+                k,
+            )
+        else:
+            distances, indices = index.search(query_vecs, k, **search_kwargs)
+        # FAISS pads missing hits with -1
+        return [
+            [(int(i), float(d)) for d, i in zip(row_distances, row_indices) if i >= 0]
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    @staticmethod
+    def _materialize(metadata, scored):
+        """Chunk dicts for (chunk_id, relevance_score) pairs, in order."""
+        results = []
+        for chunk_id, score in scored:
+            chunk = metadata.get(chunk_id)
+            if chunk is not None:
+                chunk = dict(chunk)
+                chunk["relevance_score"] = float(score)
+                results.append(chunk)
+        return results
+
+    def search_vectors(self, query_vecs, k: int = 3):
+        """Search raw query vectors; returns one result list per query row."""
+        snapshot = self.snapshot()
+        return [
+            self._materialize(snapshot[2], [(i, 1 / (1 + d)) for i, d in hits])  # Normalize relevance
+            for hits in self._vector_hits(snapshot, query_vecs, k)
+        ]
+
+    def _resolve(self, snapshot, filters: SearchFilter):
+        """Resolve filters against a generation once; repeat queries reuse the ID selector."""
+        if not filters:
+            return None
+        key = (snapshot[0], filters.key())
+        restrict = self._resolved.get(key)
+        if restrict is None:
+            if len(self._resolved) >= RESOLVED_FILTER_CACHE:
+                self._resolved.clear()
+            restrict = self._resolved[key] = filters.resolve(snapshot[5], snapshot[6])
+        return restrict
+
+    def lookup_clauses(self, clause_ids, per_clause: int = 1, filters: SearchFilter = None, documents=None):
+        """
+        Chunks tagged with each clause ID, straight from the clause index (no
+        search), optionally only those matching `filters`. A clause code that
+        several documents define is resolved in the first of `documents`
+        (doc IDs, e.g. those a search retrieved, best first) that has it, and
+        left unresolved without `documents`, so a citation never picks up
+        another policy's wording. Returns {clause_id: [chunk, ...]} for the IDs that resolve.
+        """
+        snapshot = self.snapshot()
+        metadata, clauses = snapshot[2], snapshot[5]
+        restrict = self._resolve(snapshot, filters)
+        found = {}
+        for clause_id in clause_ids:
+            chunk_ids = clauses.get(normalize_clause_id(clause_id) or "")
+            if restrict is not None:
+                chunk_ids = chunk_ids[restrict.mask(chunk_ids)]
+            chunk_ids = _in_one_document(chunk_ids, documents)[:per_clause].tolist()
+            chunks = self._materialize(metadata, [(c, 1.0) for c in chunk_ids])
+            if chunks:
+                found[clause_id] = chunks
+        return found
+
+    def search(self, queries, k: int, encode, mode: str = SEARCH_MODE, exact=None, filters: SearchFilter = None):
+        """
+        Search query texts in `mode` (see SEARCH_MODE); returns one result list
+        per query. `encode(texts)` embeds the queries that need dense search.
+        In hybrid mode, queries that name a clause code, or are flagged in
+        `exact`, are answered from the lexical index alone when it has hits.
+        `filters` restricts every query to matching chunks inside the search
+        itself (FAISS ID selector, masked postings), not by post-filtering.
+        """
+        results, dense, finish = self._plan_search(queries, k, mode, exact, filters)
+        if dense:
+            finish(encode([queries[i] for i in dense]))
+        return results
+
+    async def search_async(self, queries, k: int, encode, mode: str = SEARCH_MODE, exact=None,
+                           filters: SearchFilter = None):
+        """
+        `search` from the event loop: the index work runs on the CPU executor
+        and `encode(texts)` is awaited, so queries waiting for their embeddings
+        hold no executor thread.
+        """
+        results, dense, finish = await run_blocking(self._plan_search, queries, k, mode, exact, filters)
+        if dense:
+            await run_blocking(finish, await encode([queries[i] for i in dense]))
+        return results
+
+    def _plan_search(self, queries, k: int, mode: str, exact=None, filters: SearchFilter = None):
+        """
+        Everything `search` does before the embedder: returns (results with
+        the lexically answered queries filled in, positions of the queries
+        that need dense search, finish(vectors) filling in the rest).
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}; expected one of {SEARCH_MODES}")
+        snapshot = self.snapshot()
+        metadata, lexical = snapshot[2], snapshot[4]
+        if lexical is None and mode != "vector":
+            print(f"⚠️ Index generation {snapshot[0]} has no lexical index, using vector search")
+            mode = "vector"
+        exact = exact or [False] * len(queries)
+        restrict = self._resolve(snapshot, filters)
+        if restrict is not None and restrict.matches_nothing():
+            return [[] for _ in queries], [], None
+        allowed = restrict.mask if restrict is not None else None
+
+        results = [None] * len(queries)
+        dense = []  # positions that need the embedder
+        for i, query in enumerate(queries):
+            if mode == "lexical" or (mode == "hybrid" and (exact[i] or has_clause_code(query))):
+                hits = lexical.search(query, k, allowed)
+                if hits or mode == "lexical":
+                    SEARCH_STATS["lexical" if mode == "lexical" else "lexical_shortcut"] += 1
+                    results[i] = self._materialize(metadata, [(c, s / (1 + s)) for c, s in hits])
+                    continue
+            dense.append(i)
+
+        def finish(query_vecs):
+            depth = k * HYBRID_DEPTH if mode == "hybrid" else k
+            for i, hits in zip(dense, self._vector_hits(snapshot, query_vecs, depth, restrict)):
+                SEARCH_STATS[mode] += 1
+                if mode == "hybrid":
+                    lexical_ids = [c for c, _ in lexical.search(queries[i], depth, allowed)]
+                    fused = reciprocal_rank_fusion([[c for c, _ in hits], lexical_ids], k, RRF_K)
+                    scored = [(c, s * (RRF_K + 1) / 2) for c, s in fused]  # 1.0 = first in both rankings
+                else:
+                    scored = [(c, 1 / (1 + d)) for c, d in hits]
+                results[i] = self._materialize(metadata, scored)
+
+        return results, dense, finish
+
+
+def _in_one_document(chunk_ids: np.ndarray, documents=None) -> np.ndarray:
+    """The chunk IDs of the first of `documents` that has any; all of them if they share one document."""
+    if documents is None:
+        if len(chunk_ids) and chunk_ids[0] >> CHUNK_ORDINAL_BITS != chunk_ids[-1] >> CHUNK_ORDINAL_BITS:
+            return chunk_ids[:0]  # sorted, so first and last differ only if documents do
+        return chunk_ids
+    for doc_id in documents:
+        start, end = doc_id_range(doc_id)
+        own = chunk_ids[(chunk_ids >= start) & (chunk_ids < end)]
+        if len(own):
+            return own
+    return chunk_ids[:0]
+
+
+def _cached_vectors(texts):
+    return get_embedding_cache().lookup(texts)
+
+
+index_holder = IndexHolder(exact_lookup=_cached_vectors)
+# Other tenants' holders are created on first use and LRU-bounded; the
+# default tenant's is always resident
+tenant_indexes = TenantRegistry(
+    lambda tenant: IndexHolder(TenantPaths(tenant).index_dir, exact_lookup=_cached_vectors),
+    pinned=index_holder,
+)
+
+
+def holder_for(tenant: str = None) -> IndexHolder:
+    return tenant_indexes.get(tenant)
+
+
+def tenant_stats() -> dict:
+    return tenant_indexes.stats()
+
+# How each query was answered; lexical_shortcut = hybrid query served without the embedder
+SEARCH_STATS = {"vector": 0, "lexical": 0, "hybrid": 0, "lexical_shortcut": 0}
+
+
+def search_stats() -> dict:
+    # Per worker: with several uvicorn workers each reports its own counts and generation
+    return dict(SEARCH_STATS, mode=SEARCH_MODE, index_generation=index_holder.generation(), pid=os.getpid())
+
+
+_embedding_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(get_embedder().name, get_embedder().dim)
+    return _embedding_cache
+
+
+def encode_chunks(texts, show_progress_bar: bool = False):
+    """Embed chunk texts, re-encoding only those missing from the embedding cache."""
+    cache = get_embedding_cache()
+    cache.reset_stats()
+    embeddings = cache.get_or_encode(
+        texts, lambda missing: get_embedder().encode(missing, show_progress_bar=show_progress_bar)
+    )
+    _print_cache_stats(cache)
+    return embeddings
+
+
+def _print_cache_stats(cache: EmbeddingCache):
+    """One summary line per build or update, covering every encode since the last reset_stats."""
+    stats = cache.stats()
+    print(f"🧮 Embedding cache: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['evictions']} evicted ({stats['entries']}/{stats['max_entries']} entries)")
+
+
+def _chunk_ids(chunks):
+    return np.array([c["chunk_id"] for c in chunks], dtype="int64")
+
+
+def _document_records(metadata: ChunkTable, doc_id: str, chunks):
+    """
+    Chunk records of `metadata` with one document's range replaced by `chunks`,
+    in ID order. Existing records are copied through still encoded.
+    """
+    start, end = doc_id_range(doc_id)
+    new_records = ((c["chunk_id"], c) for c in chunks)
+    for chunk_id, record in metadata.raw_items():
+        if new_records is not None and chunk_id >= start:
+            yield from new_records
+            new_records = None
+        if not start <= chunk_id < end:
+            yield chunk_id, record
+    if new_records is not None:
+        yield from new_records
+
+
+def _iter_corpus(chunks_dir: str = CHUNKS_DIR, legacy_fallback: bool = True):
+    """(doc_id, chunks) for every stored document, falling back to the legacy single-file dump."""
+    found = False
+    for doc_id, chunks in iter_documents(chunks_dir):
+        found = True
+        yield doc_id, chunks
+    if not found and not legacy_fallback:
+        raise FileNotFoundError(f"No parsed documents found in {chunks_dir}.")
+    if not found:
+        if not os.path.exists(DATA_PATH):
+            raise FileNotFoundError("No parsed documents found. Run document_processor first.")
+        with open(DATA_PATH, "r", encoding="utf-8") as f:
+            yield "parsed_output", assign_chunk_ids("parsed_output", json.load(f))
+
+
+def build_faiss_index(tenant: str = None):
+    """
+    Full rebuild over every document in a tenant's chunk store. Documents are
+    read one at a time: only their embeddings are kept for training/adding,
+    and the chunk table is streamed from a second pass over the store.
+    """
+    paths = TenantPaths(tenant)
+    corpus = lambda: _iter_corpus(paths.chunks_dir, legacy_fallback=paths.tenant == DEFAULT_TENANT)
+    with _index_writer(paths.index_dir):
+        cache = get_embedding_cache()
+        cache.reset_stats()
+        vectors, ids = [], []
+        for _, chunks in corpus():
+            if chunks:
+                vectors.append(cache.get_or_encode([c["text"] for c in chunks], get_embedder().encode))
+                ids.append(_chunk_ids(chunks))
+        _print_cache_stats(cache)
+
+        dim = get_embedder().dim
+        embeddings = np.concatenate(vectors) if vectors else np.zeros((0, dim), dtype="float32")
+        chunk_ids = np.concatenate(ids) if ids else np.zeros(0, dtype="int64")
+        del vectors
+
+        # Vectors keep their stable chunk IDs, so documents can be removed later
+        params = index_params(len(chunk_ids), dim)
+        if params["index_type"] != params["requested_type"]:
+            print(f"ℹ️ {len(chunk_ids)} chunks is too few for {params['requested_type']}, using exact flat search")
+        index = build_index(embeddings, chunk_ids, params)
+        del embeddings
+
+        records = ((c["chunk_id"], c) for _, chunks in corpus() for c in chunks)
+        generation = write_index_generation(index, records, paths.index_dir, params=params)
+        holder_for(paths.tenant).publish(generation, index, params)
+
+    print(f"✅ FAISS index ({params['factory']}) built with {index.ntotal} chunks "
+          f"(tenant {paths.tenant}, generation {generation})")
+    return generation
+
+
+def _needs_rebuild(params: dict, n: int, dim: int) -> bool:
+    """
+    Incremental updates only work on an index of the type the corpus should
+    have and that supports removal; anything else (HNSW, or a corpus that has
+    grown past the flat fallback) is rebuilt from the chunk store.
+    """
+    return not supports_remove(params) or index_params(n, dim)["index_type"] != params.get("index_type", "flat")
+
+
+def _can_merge(snapshot) -> bool:
+    return snapshot[4] is not None  # generations without a lexical index are rebuilt in full
+
+
+def update_document_index(doc_id: str, chunks, tenant: str = None):
+    """
+    Replace one document's vectors without touching the rest of the tenant's
+    corpus. Only `chunks` are embedded; pass an empty list to remove the
+    document. The chunk store must already reflect the change, since index
+    types that can't be updated in place are rebuilt from it.
+    """
+    tenant = tenant_name(tenant)
+    embeddings = encode_chunks([c["text"] for c in chunks]) if chunks else None
+    dim = get_embedder().dim
+
+    holder = holder_for(tenant)
+    with _index_writer(holder.index_dir):
+        # Under the writer lock, so an update published by another worker is built upon, not lost
+        current = holder.latest()
+        if current is None:
+            # Nothing to update in place yet (and int8 storage needs training)
+            return build_faiss_index(tenant) if chunks else 0
+        if _needs_rebuild(current[3], current[1].ntotal + len(chunks), dim):
+            return build_faiss_index(tenant)
+
+        # Copy so searches on the published snapshot are never disturbed
+        # (a mapped index is read-only, so read a private copy of its file)
+        params = current[3]
+        if FAISS_MMAP:
+            index = read_index(generation_paths(current[0], holder.index_dir)[0], params, mmap=False)
+        else:
+            index = faiss.clone_index(current[1])
+        apply_search_params(index, params)
+
+        removed = int(index.remove_ids(faiss.IDSelectorRange(*doc_id_range(doc_id))))
+        if chunks:
+            # Trained codecs (IVF centroids, int8 ranges) keep their training until a full rebuild
+            index.add_with_ids(embeddings, _chunk_ids(chunks))
+
+        if _can_merge(current):
+            # Only this document's chunks are written; the rest is carried over from the current generation
+            generation = write_index_generation(index, ((c["chunk_id"], c) for c in chunks), holder.index_dir,
+                                                params=params, base=current, replaced=doc_id_range(doc_id))
+        else:
+            records = _document_records(current[2], doc_id, chunks)
+            generation = write_index_generation(index, records, holder.index_dir, params=params)
+        holder.publish(generation, index, params)
+
+    print(f"✅ Indexed {doc_id}: +{len(chunks)} / -{removed} chunks "
+          f"({index.ntotal} total, tenant {tenant}, generation {generation})")
+    return generation
+
+
+def remove_document_index(doc_id: str, tenant: str = None):
+    return update_document_index(doc_id, [], tenant)
+
+
+_query_batcher = EmbeddingBatcher(lambda texts: get_embedder().encode(texts), executor=cpu_executor)
+
+
+def _encode_queries(texts):
+    """Query embeddings for synchronous callers (scripts, evaluation)."""
+    return get_embedder().encode(list(texts))
+
+
+async def _encode_queries_async(texts):
+    """Query embeddings; concurrent searches share embedder calls through the batcher."""
+    if EMBED_BATCHING:
+        return await _query_batcher.encode(texts)
+    return await run_blocking(_encode_queries, texts)
+
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+def query_embedding_stats() -> dict:
+    return dict(_query_batcher.stats(), enabled=EMBED_BATCHING)
 
-def build_faiss_index():
-    if not os.path.exists(DATA_PATH):
-        raise FileNotFoundError(f"{DATA_PATH} not found. Run document_processor first.")
 
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def search_chunks(query: str, k: int = 3, mode: str = None, exact: bool = False, filters: SearchFilter = None,
+                  tenant: str = None):
+    """
+    Top-k clauses for one query in a tenant's index (the default tenant's if
+    None). `mode` overrides SEARCH_MODE; `exact` marks queries built from
+    exact procedure terms, which hybrid mode may answer lexically without
+    running the embedder. `filters` scopes the search to a document, clause
+    ID prefix and/or section.
+    """
+    return holder_for(tenant).search([query], k, _encode_queries, mode or SEARCH_MODE, [exact], filters)[0]
 
-    texts = [item["text"] for item in data]
-    embeddings = model.encode(texts, show_progress_bar=True)
 
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+async def search_chunks_async(query: str, k: int = 3, mode: str = None, exact: bool = False,
+                              filters: SearchFilter = None, tenant: str = None):
+    """`search_chunks` for the API: its query embedding joins the batch forming on the event loop."""
+    holder = holder_for(tenant)
+    return (await holder.search_async([query], k, _encode_queries_async, mode or SEARCH_MODE, [exact], filters))[0]
 
-    faiss.write_index(index, FAISS_INDEX_PATH)
-    with open(METADATA_PATH, "wb") as f:
-        pickle.dump(data, f)
 
-    print(f"✅ FAISS index built with {len(data)} chunks")
+def lookup_clauses(clause_ids, per_clause: int = 1, filters: SearchFilter = None, tenant: str = None,
+                   documents=None):
+    """Resolve clause IDs such as "Code-Excl02" to their chunks with one binary search each."""
+    return holder_for(tenant).lookup_clauses(clause_ids, per_clause, filters, documents)
 
-def search_chunks(query: str, k: int = 3):
-    if not os.path.exists(FAISS_INDEX_PATH):
-        raise FileNotFoundError("FAISS index not found. Run build_faiss_index first.")
 
-    index = faiss.read_index(FAISS_INDEX_PATH)
-    with open(METADATA_PATH, "rb") as f:
-        metadata = pickle.load(f)
+def search_chunks_batch(queries, k: int = 3, mode: str = None, exact=None, filters: SearchFilter = None,
+                        tenant: str = None):
+    """Search many queries with one encode call and one matrix FAISS search."""
+    if not queries:
+        return []
+    return holder_for(tenant).search(list(queries), k, _encode_queries, mode or SEARCH_MODE, exact, filters)
 
-    query_vec = model.encode([query])
-    distances, indices = index.search(np.array(query_vec), k)
 
-    results = []
-    for i in indices[0]:
-        if i < len(metadata):
-            chunk = metadata[i].copy()
-            chunk["relevance_score"] = float(1 / (1 + distances[0][0]))  # Normalize relevance
-            results.append(chunk)
-    return results
\ No newline at end of file
+async def search_chunks_batch_async(queries, k: int = 3, mode: str = None, exact=None, filters: SearchFilter = None,
+                                    tenant: str = None):
+    """`search_chunks_batch` for the API, encoding through the query batcher."""
+    if not queries:
+        return []
+    return await holder_for(tenant).search_async(list(queries), k, _encode_queries_async, mode or SEARCH_MODE,
+                                                 exact, filters)
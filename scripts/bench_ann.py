@@ -0,0 +1,112 @@
+# scripts/bench_ann.py
+"""
+Recall@k and per-query latency of the configurable FAISS index types
+(flat, ivf_flat, hnsw, ivf_pq) against exact flat search.
+
+Synthetic corpora are clustered unit vectors (d=384, like all-MiniLM-L6-v2
+output) rather than pure noise, which no ANN index can search well. Indexes
+are built exactly as build_faiss_index builds them (backend.ann_index), then
+each query-time knob value is swept.
+
+    python -m scripts.bench_ann --sizes 10000 100000 1000000
+    python -m scripts.bench_ann --types ivf_flat --nprobe 4 16 64
+"""
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+from backend.ann_index import INDEX_TYPES, build_index, index_params
+
+DIM = 384
+
+
+def make_corpus(n: int, queries: int, clusters: int = 0, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(100, n // 50)
+    centers = rng.standard_normal((clusters, DIM), dtype=np.float32)
+
+    def sample(count):
+        noise = rng.standard_normal((count, DIM), dtype=np.float32)
+        points = centers[rng.integers(0, clusters, count)] + 1.5 * noise
+        return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+    return sample(n), sample(queries)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index, query_vecs, k: int):
+    """Search one query at a time, like the API does; returns (ids, p50 ms, p99 ms)."""
+    ids, timings = [], []
+    for q in query_vecs:
+        start = time.perf_counter()
+        _, row = index.search(q[None, :], k)
+        timings.append((time.perf_counter() - start) * 1000)
+        ids.append(row[0])
+    return np.array(ids), np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def knob_sweep(index_type: str, args):
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return "nprobe", args.nprobe
+    if index_type == "hnsw":
+        return "efSearch", args.ef_search
+    return None, [None]
+
+
+def run(n: int, args):
+    corpus, query_vecs = make_corpus(n, args.queries)
+    ids = np.arange(n, dtype="int64")
+
+    truth = None
+    print(f"\n📊 {n:,} chunks, {args.queries} queries, k={args.k}")
+    print(f"{'index':<24}{'knob':>14}{'build s':>9}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}")
+
+    for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+        params = index_params(n, DIM, index_type)
+        if params["index_type"] != index_type:
+            print(f"{index_type:<24}  skipped: {n} vectors is below its minimum corpus size")
+            continue
+
+        start = time.perf_counter()
+        index = build_index(corpus, ids, params)
+        build_seconds = time.perf_counter() - start
+
+        knob, values = knob_sweep(index_type, args)
+        for value in values:
+            if knob:
+                if knob == "nprobe":
+                    value = min(value, params["nlist"])
+                faiss.ParameterSpace().set_index_parameter(index, knob, value)
+            found, p50, p99 = measure(index, query_vecs, args.k)
+            if truth is None:
+                truth = found  # flat runs first and is exact
+            label = f"{knob}={value}" if knob else "exact"
+            print(f"{params['factory']:<24}{label:>14}{build_seconds:>9.1f}"
+                  f"{recall_at_k(found, truth):>10.3f}{p50:>9.3f}{p99:>9.3f}")
+        del index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    print(f"🔬 ANN benchmark ({os.cpu_count()} CPUs, faiss {faiss.__version__}, d={DIM})")
+    for n in args.sizes:
+        run(n, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/bench_embedder.py
+"""
+Encode throughput of the embedding backends on CPU: the reference PyTorch
+SentenceTransformer vs. all-MiniLM-L6-v2 on ONNX Runtime (fp32 and int8).
+
+Batch size 1 is the per-query path (search_chunks); 256 is index building.
+Texts are clause-length sentences so padding matches real chunks.
+
+    python -m scripts.bench_embedder --batch-sizes 1 256 --threads 4
+"""
+import argparse
+import os
+import statistics
+import time
+
+from backend.embedder import OnnxEmbedder, TorchEmbedder
+from scripts.check_embedder_parity import SAMPLE_CLAUSES
+
+
+def make_texts(n: int):
+    return [f"{SAMPLE_CLAUSES[i % len(SAMPLE_CLAUSES)]} Clause {i}." for i in range(n)]
+
+
+def bench(embedder, batch_size: int, texts, repeats: int):
+    """Returns (texts/second, median ms per batch)."""
+    embedder.encode(texts[:batch_size], batch_size=batch_size)  # warmup
+    per_batch = []
+    for _ in range(repeats):
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            began = time.perf_counter()
+            embedder.encode(batch, batch_size=batch_size)
+            per_batch.append(time.perf_counter() - began)
+    return len(per_batch) * batch_size / sum(per_batch), statistics.median(per_batch) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 256])
+    parser.add_argument("--texts", type=int, default=1024, help="texts encoded per repeat")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = all cores)")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx-fp32", "onnx-int8"],
+                        choices=["torch", "onnx-fp32", "onnx-int8"])
+    args = parser.parse_args()
+
+    loaders = {
+        "torch": TorchEmbedder,
+        "onnx-fp32": lambda: OnnxEmbedder(quantized=False, intra_op_threads=args.threads),
+        "onnx-int8": lambda: OnnxEmbedder(quantized=True, intra_op_threads=args.threads),
+    }
+    print(f"📊 Embedding throughput ({os.cpu_count()} CPUs, {args.texts} texts x {args.repeats})")
+    baseline = {}
+    for name in args.backends:
+        embedder = loaders[name]()
+        for batch_size in args.batch_sizes:
+            # Batch size 1 is latency-bound; fewer texts keep the run short
+            texts = make_texts(min(args.texts, 128) if batch_size == 1 else args.texts)
+            rate, batch_ms = bench(embedder, batch_size, texts, args.repeats)
+            baseline.setdefault(batch_size, rate)
+            print(f"{name:>10} | batch {batch_size:>4} | {rate:8.1f} texts/s | p50 {batch_ms:8.2f} ms/batch"
+                  f" | x{rate / baseline[batch_size]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
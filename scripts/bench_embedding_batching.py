@@ -0,0 +1,74 @@
+# scripts/bench_embedding_batching.py
+"""
+Query embedding under concurrency: every caller encoding its own query
+(batch of one) vs. the micro-batching scheduler that coalesces concurrent
+queries into one embedder call.
+
+C asyncio clients each encode --queries single queries back to back, as
+concurrent /query requests do: per-request encoding runs each call on the
+CPU executor, batched encoding awaits EmbeddingBatcher.encode, which sends
+only the embedder call to the executor. Reported per mode and concurrency:
+throughput, p50/p99 latency per query and the mean batch size. Uses the
+configured embedder (EMBEDDER_BACKEND).
+
+    python -m scripts.bench_embedding_batching --concurrency 1 4 16 32 --max-wait-ms 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.concurrency import CPU_WORKERS, cpu_executor, run_blocking
+from backend.embedding_batcher import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS, EmbeddingBatcher
+from backend.vector_store import get_embedder
+from scripts.bench_embedder import make_texts
+
+
+async def run(encode, concurrency: int, queries: int, texts):
+    """Returns (queries/second, p50 ms, p99 ms); `encode` is a coroutine function."""
+    latencies = []
+
+    async def client(offset: int):
+        for i in range(queries):
+            text = texts[(offset * queries + i) % len(texts)]
+            began = time.perf_counter()
+            await encode([text])
+            latencies.append((time.perf_counter() - began) * 1000)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(concurrency)))
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / elapsed, statistics.median(latencies), p99
+
+
+async def bench(args):
+    embedder = get_embedder()
+    texts = make_texts(1024)
+    embedder.encode(texts[:32])  # warmup
+
+    print(f"📊 Query embedding with {embedder.name}, {args.queries} queries per client, "
+          f"batching up to {args.max_batch_size} texts / {args.max_wait_ms:g} ms, {CPU_WORKERS} CPU workers")
+    for concurrency in args.concurrency:
+        direct = await run(lambda batch: run_blocking(embedder.encode, batch), concurrency, args.queries, texts)
+        batcher = EmbeddingBatcher(embedder.encode, args.max_wait_ms, args.max_batch_size, executor=cpu_executor)
+        batched = await run(batcher.encode, concurrency, args.queries, texts)
+        mean_batch = batcher.stats()["mean_batch_size"]
+        for name, (rate, p50, p99), batch in (("per-request", direct, 1.0), ("batched", batched, mean_batch)):
+            print(f"C={concurrency:<3} {name:<11} | {rate:8.1f} q/s | p50 {p50:7.2f} ms  p99 {p99:7.2f} ms "
+                  f"| batch {batch:5.1f} | x{rate / direct[0]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--queries", type=int, default=50, help="queries per client")
+    parser.add_argument("--max-wait-ms", type=float, default=EMBED_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--max-batch-size", type=int, default=EMBED_BATCH_MAX_SIZE)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
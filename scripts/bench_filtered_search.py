@@ -0,0 +1,81 @@
+# scripts/bench_filtered_search.py
+"""
+Latency of filtered vs. unfiltered search on the live index: scoped to one
+document, to a clause ID prefix and to a section heading. Filters are applied
+inside FAISS (ID selectors) and to the BM25 postings, so a filtered query
+should cost about the same as an unfiltered one however large the corpus.
+Every filtered hit is checked against its filter.
+
+    python -m scripts.bench_filtered_search --queries 100 -k 4 --mode hybrid
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.document_processor import iter_documents, normalize_clause_id
+from backend.search_filters import SearchFilter, normalize_section
+from backend.vector_store import SEARCH_MODE, SEARCH_MODES, search_chunks
+
+
+def sample_filters(documents, limit: int, seed: int = 0):
+    """(name, SearchFilter, predicate) triples drawn from the indexed documents."""
+    rng = random.Random(seed)
+    doc_ids = [doc_id for doc_id, _ in documents]
+    sections = sorted({normalize_section(c["section"]) for _, chunks in documents
+                       for c in chunks if c.get("section")})
+    filters = []
+    for doc_id in rng.sample(doc_ids, min(limit, len(doc_ids))):
+        filters.append((f"doc {doc_id[:16]}", SearchFilter(doc_id=doc_id),
+                        lambda c, d=doc_id: c["doc_id"] == d))
+    filters.append(("clause Code-Excl", SearchFilter(clause_prefix="Code-Excl"),
+                    lambda c: (normalize_clause_id(c.get("clause_id", "general")) or "").startswith("code-excl")))
+    for section in rng.sample(sections, min(limit, len(sections))):
+        filters.append((f"section {section[:20]}", SearchFilter(section=section),
+                        lambda c, s=section: normalize_section(c.get("section") or "") == s))
+    return filters
+
+
+def timed(queries, k: int, mode: str, filters=None, predicate=None):
+    """Returns (p50 ms, p99 ms, hits, hits violating the filter)."""
+    latencies, hits, violations = [], 0, 0
+    for query in queries:
+        start = time.perf_counter()
+        results = search_chunks(query, k=k, mode=mode, filters=filters)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(results)
+        if predicate is not None:
+            violations += sum(1 for chunk in results if not predicate(chunk))
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies), p99, hits, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--filters", type=int, default=3, help="documents and sections to sample")
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--mode", choices=SEARCH_MODES, default=SEARCH_MODE)
+    args = parser.parse_args()
+
+    documents = list(iter_documents())
+    texts = [c["text"] for _, chunks in documents for c in chunks]
+    if not texts:
+        raise SystemExit("❌ No documents in the chunk store; upload some PDFs first")
+    rng = random.Random(1)
+    queries = [" ".join(t.split()[:12]) for t in rng.choices(texts, k=args.queries)]
+    search_chunks("warmup", k=args.k, mode=args.mode)  # load the index and embedder once
+
+    print(f"📊 Filtered search on {len(texts):,} chunks in {len(documents)} documents, "
+          f"k={args.k}, mode={args.mode}")
+    p50, p99, hits, _ = timed(queries, args.k, args.mode)
+    print(f"{'unfiltered':<30} | p50 {p50:7.2f} ms  p99 {p99:7.2f} ms | {hits / len(queries):.1f} hits/query")
+    for name, filters, predicate in sample_filters(documents, args.filters):
+        p50, p99, hits, violations = timed(queries, args.k, args.mode, filters, predicate)
+        flag = f" ❌ {violations} outside filter" if violations else ""
+        print(f"{name:<30} | p50 {p50:7.2f} ms  p99 {p99:7.2f} ms | {hits / len(queries):.1f} hits/query{flag}")
+
+
+if __name__ == "__main__":
+    main()
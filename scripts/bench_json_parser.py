@@ -0,0 +1,248 @@
+# scripts/bench_json_parser.py
+"""
+Fuzz + microbenchmark for parse_lenient_json against the regex repair chain
+it replaced (clean_llm_response / emergency_json_fix in llm.py and
+extract_first_json_block / fix_json_syntax / try_fix_truncated_json in
+pipeline.py, copied below unchanged so the comparison stays reproducible).
+
+    python -m scripts.bench_json_parser
+"""
+import ast
+import json
+import os
+import random
+import re
+import time
+
+from backend.json_utils import parse_lenient_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "phi3_outputs.json")
+# Decision replies with unquoted garbage values (also used by check_llm_fallback)
+GARBLED_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "phi3_garbled_decisions.json")
+
+
+# --- Legacy regex chain (as of the baseline) ---------------------------------
+
+def legacy_clean_llm_response(response: str) -> str:
+    response = re.sub(r'```json|```', '', response, flags=re.IGNORECASE)
+    response = re.sub(r'(?i)(end of document|thank you|system:|assistant:|here is|here\'s)', '', response)
+    response = response.strip()
+    response = re.sub(r':\s*0+(\d+\.\d+)', r': \1', response)
+    response = re.sub(r':\s*0+(\d+)(?!\d)', r': \1', response)
+    response = re.sub(r'([a-zA-Z_]\w*)\s*:', r'"\1":', response)
+    response = re.sub(r',(\s*[}\]])', r'\1', response)
+    response = re.sub(r':\s*approved(?![a-zA-Z])', ': "approved"', response)
+    response = re.sub(r':\s*rejected(?![a-zA-Z])', ': "rejected"', response)
+    response = re.sub(r':\s*conditional(?![a-zA-Z])', ': "conditional"', response)
+    response = re.sub(r':\s*male(?![a-zA-Z])', ': "male"', response)
+    response = re.sub(r':\s*female(?![a-zA-Z])', ': "female"', response)
+    response = re.sub(r':\s*Up to Sum Insured', ': "Up to Sum Insured"', response)
+    if not response.startswith('{'):
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if json_match:
+            response = json_match.group(0)
+    if response.startswith('{') and not response.endswith('}'):
+        open_braces = response.count('{') - response.count('}')
+        open_brackets = response.count('[') - response.count(']')
+        response += ']' * open_brackets + '}' * open_braces
+    return response
+
+
+def legacy_emergency_json_fix(content: str) -> str:
+    if not content.strip():
+        return '{"error": "empty_content"}'
+    if content.startswith('{') and not content.endswith('}'):
+        open_count = content.count('{')
+        close_count = content.count('}')
+        if open_count > close_count:
+            content += '}' * (open_count - close_count)
+    try:
+        json.loads(content)
+        return content
+    except:
+        return '{"error": "malformed_json", "raw_content": "' + content.replace('"', '\\"')[:100] + '"}'
+
+
+def legacy_fix_json_syntax(json_str: str) -> str:
+    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
+    json_str = re.sub(r':\s*([a-zA-Z][a-zA-Z0-9\s]*[a-zA-Z0-9])\s*(?=[,}])', r': "\1"', json_str)
+    json_str = re.sub(r':\s*([^",{\[\]}\s][^",{\[\]]*[^",{\[\]}\s])\s*(?=[,}])', r': "\1"', json_str)
+    return json_str
+
+
+def legacy_try_fix_truncated_json(text: str) -> str:
+    lines = text.split('\n')
+    for i in range(len(lines), 0, -1):
+        candidate = '\n'.join(lines[:i])
+        brace_count = 0
+        last_complete = -1
+        for j, char in enumerate(candidate):
+            if char == '{':
+                brace_count += 1
+            elif char == '}':
+                brace_count -= 1
+            elif char == ',' and brace_count == 1:
+                last_complete = j
+        if last_complete > 0:
+            truncated = candidate[:last_complete] + '}'
+            try:
+                json.loads(truncated)
+                return truncated
+            except:
+                continue
+    return ""
+
+
+def legacy_extract_first_json_block(text: str) -> str:
+    text = re.sub(r'```json|```', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'(?i)(end of document|thank you|system:|assistant:)', '', text)
+    text = text.strip()
+    text = re.sub(r'([a-zA-Z_]\w*)\s*:', r'"\1":', text)
+    text = re.sub(r':\s*0+(\d+\.\d+)', r': \1', text)
+    text = re.sub(r':\s*0+(\d+)', r': \1', text)
+    text = re.sub(r':\s*null\b', ': null', text, flags=re.IGNORECASE)
+    text = re.sub(r':\s*true\b', ': true', text, flags=re.IGNORECASE)
+    text = re.sub(r':\s*false\b', ': false', text, flags=re.IGNORECASE)
+    start = text.find('{')
+    if start == -1:
+        return ""
+    brace_count = 0
+    for i in range(start, len(text)):
+        if text[i] == '{':
+            brace_count += 1
+        elif text[i] == '}':
+            brace_count -= 1
+        if brace_count == 0:
+            candidate = text[start:i+1]
+            if candidate.count('{') > candidate.count('}'):
+                candidate += '}' * (candidate.count('{') - candidate.count('}'))
+            try:
+                json.loads(candidate)
+                return candidate
+            except json.JSONDecodeError:
+                fixed = legacy_fix_json_syntax(candidate)
+                try:
+                    json.loads(fixed)
+                    return fixed
+                except:
+                    try:
+                        parsed = ast.literal_eval(candidate.replace("null", "None").replace("true", "True").replace("false", "False"))
+                        if isinstance(parsed, dict):
+                            return json.dumps(parsed)
+                    except:
+                        continue
+    return legacy_try_fix_truncated_json(text)
+
+
+def legacy_parse(raw: str):
+    """Old end-to-end path: call_phi3 cleaning, then the pipeline's re-extraction."""
+    content = legacy_clean_llm_response(raw)
+    try:
+        json.loads(content)
+    except json.JSONDecodeError:
+        content = legacy_emergency_json_fix(content)
+    json_str = legacy_extract_first_json_block(content)
+    if not json_str:
+        return None
+    result = json.loads(json_str)
+    return None if "error" in result else result
+
+
+# --- Fuzzing -------------------------------------------------------------------
+
+MUTATION_CHARS = '{}[]",:\'\n \\ax0'
+
+
+def mutations(sample: str, rng: random.Random, count: int):
+    for _ in range(count):
+        chars = list(sample)
+        for _ in range(rng.randint(1, 4)):
+            op = rng.random()
+            pos = rng.randrange(len(chars) + 1)
+            if op < 0.4:
+                chars.insert(pos, rng.choice(MUTATION_CHARS))
+            elif op < 0.7 and chars:
+                del chars[min(pos, len(chars) - 1)]
+            elif chars:
+                chars[min(pos, len(chars) - 1)] = rng.choice(MUTATION_CHARS)
+        yield "".join(chars)
+
+
+def fuzz(corpus, per_sample: int = 200, seed: int = 7):
+    rng = random.Random(seed)
+    inputs = []
+    for sample in corpus:
+        inputs.extend(sample[:i] for i in range(len(sample) + 1))  # every truncation
+        inputs.extend(mutations(sample, rng, per_sample))
+
+    new_dicts = legacy_dicts = legacy_crashes = 0
+    for text in inputs:
+        result = parse_lenient_json(text)  # must never raise
+        assert result is None or isinstance(result, dict), repr(text)
+        new_dicts += bool(result)
+        try:
+            legacy_dicts += bool(legacy_parse(text))
+        except Exception:
+            legacy_crashes += 1
+
+    print(f"🧪 Fuzzed {len(inputs)} inputs: parse_lenient_json never raised")
+    print(f"   objects recovered: lenient {new_dicts / len(inputs):.1%}, "
+          f"legacy {legacy_dicts / len(inputs):.1%} (legacy raised on {legacy_crashes})")
+
+
+# --- Benchmark -----------------------------------------------------------------
+
+def time_per_call(fn, inputs, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in inputs:
+            try:
+                fn(text)
+            except Exception:
+                pass
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def benchmark(corpus, repeat: int = 200):
+    lenient = time_per_call(parse_lenient_json, corpus, repeat)
+    legacy = time_per_call(legacy_parse, corpus, repeat)
+    print(f"⏱  corpus ({len(corpus)} outputs): lenient {lenient:7.1f} µs/call, legacy {legacy:7.1f} µs/call "
+          f"(x{legacy / lenient:.1f})")
+
+    # Long output cut off mid-string. The legacy chain never reaches its line-by-line
+    # try_fix_truncated_json here: clean_llm_response closes the braces and
+    # emergency_json_fix then swaps the unparsable text for an error object. So
+    # this compares cost per call, not the quadratic repair. The lenient parser
+    # is about as fast but recovers the complete members.
+    for lines in (50, 200, 800):
+        body = ",\n".join(f'  "field_{i}": "value {i}"' for i in range(lines))
+        truncated = "{\n" + body + ',\n  "cut": "unfinish'
+        lenient = time_per_call(parse_lenient_json, [truncated], 5)
+        legacy = time_per_call(legacy_parse, [truncated], 5)
+        kept_new = len(parse_lenient_json(truncated) or {})
+        kept_old = len(legacy_parse(truncated) or {})
+        print(f"⏱  truncated, {lines:>4} lines: lenient {lenient / 1000:8.2f} ms ({kept_new} fields), "
+              f"legacy {legacy / 1000:8.2f} ms ({kept_old} fields)")
+
+
+def main():
+    corpus = []
+    for path in (CORPUS_PATH, GARBLED_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            corpus += json.load(f)
+
+    recovered_new = sum(bool(parse_lenient_json(t)) for t in corpus)
+    recovered_old = 0
+    for t in corpus:
+        try:
+            recovered_old += bool(legacy_parse(t))
+        except Exception:
+            pass
+    print(f"📄 Corpus: lenient parsed {recovered_new}/{len(corpus)}, legacy {recovered_old}/{len(corpus)}")
+
+    fuzz(corpus)
+    benchmark(corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/bench_retrieval.py
+"""
+Latency and hit quality of the three retrieval modes (vector, lexical,
+hybrid) on the live index built from the chunk store.
+
+Two query sets are derived from the indexed clauses themselves, each with a
+known target chunk:
+  - clause codes: "<Code-ExclNN> exclusion" must retrieve a chunk tagged NN
+  - excerpts:     a run of words from the middle of a clause must retrieve it
+The claim queries from eval_fast_path are timed too (no relevance labels).
+
+    python -m scripts.bench_retrieval --queries 200 -k 4
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.document_processor import load_all_chunks
+from backend.pipeline import build_search_query, extract_query_fields, has_exact_procedure
+from backend.vector_store import SEARCH_MODES, search_chunks
+from scripts.eval_fast_path import LABELLED_QUERIES
+
+
+def clause_code_queries(chunks, limit: int):
+    by_code = {}
+    for c in chunks:
+        if c.get("clause_id", "general") != "general":
+            by_code.setdefault(c["clause_id"], set()).add(c["chunk_id"])
+    return [(f"{code.strip('()')} exclusion", targets, False) for code, targets in list(by_code.items())[:limit]]
+
+
+def excerpt_queries(chunks, limit: int, words: int = 8, seed: int = 0):
+    rng = random.Random(seed)
+    queries = []
+    for c in rng.sample(chunks, min(limit, len(chunks))):
+        tokens = c["text"].split()
+        if len(tokens) < words:
+            continue
+        start = rng.randrange(0, len(tokens) - words + 1)
+        queries.append((" ".join(tokens[start:start + words]), {c["chunk_id"]}, False))
+    return queries
+
+
+def claim_queries():
+    queries = []
+    for text, _ in LABELLED_QUERIES:
+        fields, _ = extract_query_fields(text)
+        queries.append((build_search_query(fields), None, has_exact_procedure(fields)))
+    return queries
+
+
+def evaluate(queries, mode: str, k: int):
+    """Returns (hit@k, MRR, p50 ms, p99 ms); quality is None for unlabelled queries."""
+    latencies, hits, reciprocal_ranks = [], 0, 0.0
+    for query, targets, exact in queries:
+        start = time.perf_counter()
+        results = search_chunks(query, k=k, mode=mode, exact=exact)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if targets is None:
+            continue
+        ranks = [r for r, chunk in enumerate(results, start=1) if chunk["chunk_id"] in targets]
+        if ranks:
+            hits += 1
+            reciprocal_ranks += 1 / ranks[0]
+    labelled = sum(1 for _, targets, _ in queries if targets is not None)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    quality = (hits / labelled, reciprocal_ranks / labelled) if labelled else (None, None)
+    return (*quality, statistics.median(latencies), p99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200, help="queries per derived set")
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    chunks = load_all_chunks()
+    if not chunks:
+        raise SystemExit("❌ No documents in the chunk store; upload some PDFs first")
+    search_chunks("warmup", k=args.k, mode="vector")  # load the index and embedder once
+
+    query_sets = {
+        "clause codes": clause_code_queries(chunks, args.queries),
+        "excerpts": excerpt_queries(chunks, args.queries),
+        "claims": claim_queries(),
+    }
+    print(f"📊 Retrieval modes on {len(chunks):,} chunks, k={args.k}")
+    for name, queries in query_sets.items():
+        if not queries:
+            print(f"{name:<13} (no queries)")
+            continue
+        for mode in SEARCH_MODES:
+            hit_rate, mrr, p50, p99 = evaluate(queries, mode, args.k)
+            quality = f"hit@{args.k} {hit_rate:6.1%}  MRR {mrr:.3f}" if hit_rate is not None else " " * 22
+            print(f"{name:<13} n={len(queries):<4} {mode:<8} | {quality} | p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/bench_search.py
+"""
+Per-query search latency: legacy load-per-query (FAISS index + pickled
+metadata) vs. resident IndexHolder with its memory-mapped chunk table.
+
+Uses synthetic 384-d vectors so only retrieval is measured (no embedding).
+Run from the repo root:  python -m scripts.bench_search --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import pickle
+import statistics
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from backend.vector_store import IndexHolder, write_index_generation, generation_paths
+
+DIM = 384
+
+
+def make_corpus(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    metadata = {i: {"text": f"synthetic clause {i}", "clause_id": "general"} for i in range(n)}
+    return vectors, metadata
+
+
+def legacy_search(index_path, metadata_path, query_vec, k):
+    """What search_chunks did before: reload everything on every query."""
+    index = faiss.read_index(index_path)
+    with open(metadata_path, "rb") as f:
+        metadata = pickle.load(f)
+    distances, indices = index.search(query_vec, k)
+    return [metadata[i] for i in indices[0] if i in metadata]
+
+
+def time_calls(fn, queries, repeats):
+    timings = []
+    for q in queries[:repeats]:
+        start = time.perf_counter()
+        fn(q)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def run(n: int, queries: int, legacy_queries: int, k: int = 4):
+    vectors, metadata = make_corpus(n)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(vectors)
+    query_vecs = np.random.default_rng(1).standard_normal((queries, 1, DIM), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        generation = write_index_generation(index, sorted(metadata.items()), index_dir=index_dir)
+        index_path = generation_paths(generation, index_dir)[0]
+        metadata_path = os.path.join(index_dir, "metadata.pkl")
+        with open(metadata_path, "wb") as f:
+            pickle.dump(metadata, f)
+
+        before = time_calls(lambda q: legacy_search(index_path, metadata_path, q, k), query_vecs, legacy_queries)
+
+        holder = IndexHolder(index_dir)
+        start = time.perf_counter()
+        holder.snapshot()  # initial load is paid once at startup, not per query
+        load_ms = (time.perf_counter() - start) * 1000
+        after = time_calls(lambda q: holder.search_vectors(q, k), query_vecs, queries)
+
+    print(f"{n:>9} chunks | before p50 {before[0]:9.2f} ms  max {before[1]:9.2f} ms"
+          f" | after p50 {after[0]:7.2f} ms  max {after[1]:7.2f} ms (startup {load_ms:.0f} ms)"
+          f" | speedup x{before[0] / max(after[0], 1e-9):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--legacy-queries", type=int, default=5,
+                        help="legacy path reloads the index per query, keep this small for 1M")
+    args = parser.parse_args()
+
+    print(f"📊 FAISS search latency ({os.cpu_count()} CPUs, IndexFlatL2, d={DIM})")
+    for n in args.sizes:
+        run(n, args.queries, args.legacy_queries)
+
+
+if __name__ == "__main__":
+    main()
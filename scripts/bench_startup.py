@@ -0,0 +1,79 @@
+# scripts/bench_startup.py
+"""
+Startup cost of the API process: how long `import backend.main` takes, and
+how long a fresh uvicorn server takes to answer /healthz (accepting
+connections) and /readyz (embedder loaded, Phi-3 warm).
+
+Each run starts a new interpreter, so nothing is shared between runs.
+Run from the repo root:  python -m scripts.bench_startup --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+
+
+def time_import() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _status(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def time_to_ready(port: int, timeout: float):
+    """Seconds from process start until /healthz and then /readyz return 200."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    start = time.perf_counter()
+    live = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if live is None and _status(f"http://127.0.0.1:{port}/healthz") == 200:
+                live = time.perf_counter() - start
+            if live is not None and _status(f"http://127.0.0.1:{port}/readyz") == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+    return live, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    print(f"📦 import backend.main: median {statistics.median(imports) * 1000:.0f} ms "
+          f"(max {max(imports) * 1000:.0f} ms, {args.runs} runs)")
+
+    for run in range(args.runs):
+        live, ready = time_to_ready(args.port, args.timeout)
+        live_text = f"{live:.2f}s" if live is not None else "never"
+        ready_text = f"{ready:.2f}s" if ready is not None else f"not ready after {args.timeout:.0f}s"
+        print(f"🚦 run {run + 1}: /healthz {live_text}, /readyz {ready_text}"
+              f" (OLLAMA_HOST={os.getenv('OLLAMA_HOST', 'http://localhost:11434')})")
+
+
+if __name__ == "__main__":
+    main()
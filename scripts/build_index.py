@@ -1,24 +1,136 @@
 # scripts/build_index.py
+"""
+Bulk-load every PDF in a tenant's upload directory (data/uploaded_docs for
+the default tenant) and rebuild that tenant's FAISS index.
+
+PDFs are parsed across a process pool; parsed chunks are streamed through a
+bounded queue to an embedder thread that encodes them in fixed-size batches
+(into the embedding cache) while parsing continues. The index is written once
+at the end, and by then every vector is a cache hit.
+
+    python -m scripts.build_index --workers 8 --batch-size 256 [--tenant acme]
+"""
+import argparse
+import multiprocessing
 import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 from backend.document_processor import save_and_process_pdf
-from backend.vector_store import build_faiss_index
+from backend.tenants import TenantPaths
+
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+QUEUE_DOCUMENTS = int(os.getenv("INGEST_QUEUE_DOCUMENTS", "64"))
+
+_DONE = object()
+
+
+def _parse_pdf(path, chunks_dir):
+    """Worker: parse one PDF into the chunk store; only the chunk texts travel back."""
+    doc_id, chunks = save_and_process_pdf(path, chunks_dir)
+    return doc_id, [c["text"] for c in chunks]
+
+
+def _parse_all(paths, chunks_dir: str, workers: int, parsed: queue.Queue, progress: dict):
+    """
+    Producer: keep at most 2 * workers PDFs in flight and push each result
+    onto `parsed`, which blocks once the embedder falls behind.
+    """
+    # Spawned workers import only the document processor, never the embedding model
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = iter(paths)
+            in_flight = {}
+            while True:
+                while len(in_flight) < 2 * workers:
+                    path = next(pending, None)
+                    if path is None:
+                        break
+                    in_flight[pool.submit(_parse_pdf, path, chunks_dir)] = path
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    try:
+                        parsed.put(future.result())
+                    except Exception as e:
+                        progress["failed"].append((os.path.basename(path), str(e)))
+                    progress["parsed"] += 1
+    finally:
+        parsed.put(_DONE)
+
 
-DOCS_DIR = "data/uploaded_docs"
+def _embed_batch(texts, progress: dict):
+    from backend.vector_store import get_embedding_cache, get_embedder
 
-def build_from_all_pdfs():
-    pdf_files = [f for f in os.listdir(DOCS_DIR) if f.lower().endswith(".pdf")]
+    get_embedding_cache().get_or_encode(texts, get_embedder().encode)
+    progress["embedded"] += len(texts)
+
+
+def _report(progress: dict, total: int, started: float):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"⏳ {progress['parsed']}/{total} PDFs parsed ({progress['parsed'] / elapsed:.1f}/s), "
+          f"{progress['embedded']} chunks embedded ({progress['embedded'] / elapsed:.0f}/s)")
+
+
+def build_from_all_pdfs(workers: int = 0, batch_size: int = EMBED_BATCH_SIZE, tenant: str = None):
+    tenant_paths = TenantPaths(tenant)
+    docs_dir = tenant_paths.upload_dir
+    pdf_files = sorted(f for f in os.listdir(docs_dir) if f.lower().endswith(".pdf")) if os.path.isdir(docs_dir) else []
     if not pdf_files:
-        print("❌ No PDFs found in", DOCS_DIR)
+        print("❌ No PDFs found in", docs_dir)
         return
 
-    for filename in pdf_files:
-        path = os.path.join(DOCS_DIR, filename)
-        print(f"📄 Processing {filename}...")
-        save_and_process_pdf(path)
+    from backend.vector_store import build_faiss_index, get_embedding_cache
+
+    workers = workers or os.cpu_count() or 1
+    paths = [os.path.join(docs_dir, f) for f in pdf_files]
+    parsed = queue.Queue(maxsize=QUEUE_DOCUMENTS)
+    progress = {"parsed": 0, "embedded": 0, "failed": []}
+    print(f"📄 Ingesting {len(paths)} PDFs with {workers} parser processes, "
+          f"embedding in batches of {batch_size}...")
 
+    started = time.perf_counter()
+    get_embedding_cache().reset_stats()
+    producer = threading.Thread(target=_parse_all, args=(paths, tenant_paths.chunks_dir, workers, parsed, progress), daemon=True)
+    producer.start()
+
+    # Embed on this thread while the pool keeps parsing
+    batch = []
+    last_report = started
+    while True:
+        item = parsed.get()
+        if item is _DONE:
+            break
+        batch.extend(item[1])
+        while len(batch) >= batch_size:
+            _embed_batch(batch[:batch_size], progress)
+            batch = batch[batch_size:]
+        if time.perf_counter() - last_report >= 5:
+            _report(progress, len(paths), started)
+            last_report = time.perf_counter()
+    if batch:
+        _embed_batch(batch, progress)
+    producer.join()
+    _report(progress, len(paths), started)
+
+    for name, error in progress["failed"]:
+        print(f"⚠️ Skipped {name}: {error}")
+
+    # Each PDF now has its own entry in the chunk store, so the rebuild covers all of them
     print("✅ All PDFs processed. Building FAISS index...")
-    build_faiss_index()
-    print("🎉 Index built successfully!")
+    build_faiss_index(tenant_paths.tenant)
+    print(f"🎉 Index built successfully in {time.perf_counter() - started:.1f}s!")
+
 
 if __name__ == "__main__":
-    build_from_all_pdfs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=0, help="parser processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="chunks per embedding batch")
+    parser.add_argument("--tenant", default=None, help="tenant namespace (default: the default tenant)")
+    args = parser.parse_args()
+    build_from_all_pdfs(args.workers, args.batch_size, args.tenant)
@@ -0,0 +1,133 @@
+# scripts/check_admission.py
+"""
+Checks that Phi-3 admission control keeps goodput at capacity under overload.
+
+A fake Ollama serves CAPACITY generations at a time, SERVICE seconds each,
+and like the real server it finishes queued work even after the client has
+given up. Claims arrive open-loop at 0.5x-4x that capacity; each runs one
+call_phi3_async, which is admitted (or refused with 429), and counts as good
+if it answers within the client deadline. Goodput is measured over the whole
+run, until the last claim is answered. Every level runs twice, without and
+with admission control: without it the queue grows until almost nothing
+finishes in time; with it, excess claims are refused at once, goodput stays
+near capacity and p99 latency stays bounded.
+
+    python -m scripts.check_admission
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+# Every claim must reach the model: no response cache; the fake answers unstreamed
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["LLM_STREAM_EARLY_STOP"] = "0"
+
+import backend.llm as llm  # noqa: E402
+from backend.concurrency import AdmissionControl, Overloaded  # noqa: E402
+
+CAPACITY = 2
+SERVICE = 0.1  # seconds per generation
+DEADLINE = 3.0  # client timeout, scaled down from Streamlit's 30s
+MAX_QUEUE_WAIT = 2.0
+DURATION = 4.0  # seconds of arrivals per level
+DECISION = '{"decision": "approved", "confidence": 0.8, "reason": "waiting period passed"}'
+
+
+class FakeOllama:
+    """Serves CAPACITY generations at once; abandoned requests are still processed."""
+
+    def __init__(self):
+        self._slots = None
+
+    async def list(self):
+        return {"models": []}
+
+    async def _serve(self):
+        async with self._slots:
+            await asyncio.sleep(SERVICE)
+        return {"response": DECISION}
+
+    async def generate(self, model, prompt, options=None, stream=False, keep_alive=None):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(CAPACITY)
+        return await asyncio.shield(asyncio.ensure_future(self._serve()))
+
+
+def p99(latencies) -> float:
+    if not latencies:
+        return float("nan")
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+async def offered_load(control: AdmissionControl, overload: float):
+    """Returns (goodput per second, p99 latency of answered claims, late answers, refused claims)."""
+    server = FakeOllama()
+    llm.llm_admission = control
+    llm.get_async_client = lambda: server
+    good = late = refused = 0
+    latencies = []
+
+    async def claim(n: int):
+        nonlocal good, late, refused
+        start = time.monotonic()
+        try:
+            # Prompts are unique per run, so no claim coalesces with one still generating from the last run
+            prompt = f"{control.name} {overload}x {id(control)} claim {n}"
+            await asyncio.wait_for(llm.call_phi3_async(prompt, max_retries=0), DEADLINE)
+        except Overloaded:
+            refused += 1
+            return
+        except asyncio.TimeoutError:
+            late += 1
+            latencies.append(DEADLINE)  # the client gave up; its answer is at least this late
+            return
+        latencies.append(time.monotonic() - start)
+        if latencies[-1] <= DEADLINE:
+            good += 1
+        else:
+            late += 1
+
+    rate = overload * CAPACITY / SERVICE
+    tasks = []
+    began = time.monotonic()
+    n = 0
+    while time.monotonic() - began < DURATION:
+        tasks.append(asyncio.create_task(claim(n)))
+        n += 1
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    # Over the whole run, until the last claim was answered or given up on
+    return good / (time.monotonic() - began), p99(latencies), late, refused
+
+
+async def main():
+    capacity = CAPACITY / SERVICE
+    print(f"📊 Fake Phi-3 capacity {capacity:.0f} claims/s, client deadline {DEADLINE:g}s")
+    failures = []
+    for overload in (0.5, 1.0, 2.0, 4.0):
+        # Without admission control every generation is let in and queues at Ollama
+        unbounded = AdmissionControl("llm", 10 ** 6, 10 ** 6, float("inf"), SERVICE)
+        bounded = AdmissionControl("llm", CAPACITY, 16, MAX_QUEUE_WAIT, SERVICE)
+        with contextlib.redirect_stdout(io.StringIO()):  # call_phi3_async logs every prompt
+            without = await offered_load(unbounded, overload)
+            with_control = await offered_load(bounded, overload)
+        for name, (goodput, tail, late, refused) in (("no admission", without), ("admission", with_control)):
+            print(f"{overload:>4}x load | {name:<12} | goodput {goodput:5.1f}/s "
+                  f"({goodput / capacity:4.0%} of capacity) | p99 {tail:5.2f}s | {late:>4} late "
+                  f"| {refused:>4} refused (429)")
+        if with_control[0] < 0.8 * min(overload, 1.0) * capacity:
+            failures.append(f"goodput below 80% of capacity at {overload}x load")
+        if overload > 1 and (with_control[0] < without[0] or with_control[1] > without[1]):
+            failures.append(f"no better than without admission control at {overload}x load")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        raise SystemExit(1)
+    print("✅ Admission control holds goodput near capacity and bounds p99 under overload")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
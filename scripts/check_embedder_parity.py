@@ -0,0 +1,75 @@
+# scripts/check_embedder_parity.py
+"""
+Checks that the ONNX Runtime embedder agrees with the reference
+SentenceTransformer model: per-text cosine similarity between the two
+backends' vectors must stay above a threshold, and nearest-neighbour
+rankings over the same texts must mostly match.
+
+Uses the labelled claims plus the chunk store (when it has documents).
+
+    python -m scripts.check_embedder_parity
+    python -m scripts.check_embedder_parity --fp32 --min-cosine 0.999
+"""
+import argparse
+
+import numpy as np
+
+from backend.document_processor import load_all_chunks
+from backend.embedder import OnnxEmbedder, TorchEmbedder
+from scripts.eval_fast_path import LABELLED_QUERIES
+
+# Synthetic clause-like texts so the check runs without any uploaded documents
+SAMPLE_CLAUSES = [
+    "Cataract surgery is covered after a waiting period of 24 months from policy inception.",
+    "Expenses related to cosmetic or plastic surgery are excluded (Code-Excl08).",
+    "Pre-existing diseases are covered after 36 months of continuous coverage.",
+    "Emergency hospitalization following an accident is covered from day one.",
+    "Knee replacement surgery is subject to a sub-limit of 50% of the sum insured.",
+    "Treatment taken outside India is not payable under this policy (Code-Excl15).",
+    "Maternity expenses are covered after a waiting period of 9 months.",
+    "Ayurvedic, Unani and Homeopathic treatments are covered up to the sum insured.",
+]
+
+
+def parity_texts(limit: int):
+    texts = [q for q, _ in LABELLED_QUERIES] + SAMPLE_CLAUSES
+    texts += [c["text"] for c in load_all_chunks()[:max(0, limit - len(texts))]]
+    return texts[:limit]
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Mean share of each text's k nearest neighbours (by reference vectors) both backends agree on."""
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return 1.0
+    ref_top = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    cand_top = np.argsort(-(candidate @ candidate.T), axis=1)[:, 1:k + 1]
+    return float(np.mean([len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=500, help="texts to compare")
+    parser.add_argument("--fp32", action="store_true", help="check the unquantized ONNX export")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="lowest acceptable per-text cosine")
+    parser.add_argument("--min-overlap", type=float, default=0.8, help="lowest acceptable mean top-5 overlap")
+    args = parser.parse_args()
+
+    texts = parity_texts(args.limit)
+    reference = TorchEmbedder().encode(texts)
+    onnx = OnnxEmbedder(quantized=not args.fp32)
+    candidate = onnx.encode(texts)
+
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+    overlap = top_k_overlap(reference, candidate, 5)
+    print(f"📐 {onnx.name} vs. reference on {len(texts)} texts: cosine mean {cosine.mean():.4f}, "
+          f"min {cosine.min():.4f}, p1 {np.percentile(cosine, 1):.4f} | top-5 neighbour overlap {overlap:.1%}")
+
+    assert cosine.min() >= args.min_cosine, f"cosine {cosine.min():.4f} below {args.min_cosine}"
+    assert overlap >= args.min_overlap, f"top-5 overlap {overlap:.1%} below {args.min_overlap:.0%}"
+    print("✅ ONNX embedder matches the reference model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# scripts/check_llm_fallback.py
+"""
+Checks that a garbled Phi-3 decision never breaks a claim: for every reply in
+scripts/fixtures/phi3_garbled_decisions.json (`"confidence": high`, `.8`,
+`0.8 (high)`, unknown decisions, ...) the single, streamed and batched
+pipelines must finish and keep the rule-based decision and confidence.
+
+Runs against an in-process fake Ollama client, so no model is needed.
+
+    python -m scripts.check_llm_fallback
+"""
+import asyncio
+import json
+import os
+
+# Every reply must reach the parser, not an earlier reply's cache entry
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+import backend.llm as llm  # noqa: E402
+import backend.pipeline as pipeline  # noqa: E402
+from backend.json_utils import parse_lenient_json  # noqa: E402
+
+GARBLED_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "phi3_garbled_decisions.json")
+# Fully regex-parsable, so the decision prompt is the only LLM call
+QUERY = "46-year-old male, knee surgery in Pune, 3-month-old insurance policy"
+
+
+class ReplyClient:
+    """Stands in for ollama.AsyncClient and answers every prompt with `reply`."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+
+    async def list(self):
+        return {"models": []}
+
+    async def generate(self, model, prompt, options=None, stream=False, keep_alive=None):
+        if stream:
+            return _stream(self.reply)
+        return {"response": self.reply}
+
+
+async def _stream(text: str):
+    yield {"response": text, "done": True}
+
+
+def check_parsed(reply: str):
+    """Unquoted garbage must be dropped by the parser, not passed on as text."""
+    parsed = parse_lenient_json(reply) or {}
+    for key, value in parsed.items():
+        assert not isinstance(value, str) or f'"{value}"' in reply, f"unquoted {key} kept as text: {reply!r}"
+
+
+def check_result(result: dict, rule: dict, reply: str, path: str):
+    assert "error" not in result, f"{path}: {result.get('error')} for {reply!r}"
+    assert result["decision"] == rule["decision"], f"{path}: decision changed for {reply!r}"
+    assert result["confidence"] == rule["confidence"], f"{path}: confidence {result['confidence']!r} for {reply!r}"
+    assert result.get("user_friendly_response"), f"{path}: no response text for {reply!r}"
+
+
+async def check_reply(reply: str):
+    check_parsed(reply)
+    llm.get_async_client = lambda: ReplyClient(reply)
+    rule = pipeline.make_rule_based_decision(await pipeline.parse_query_to_json(QUERY))
+
+    check_result(await pipeline.run_pipeline_async(QUERY), rule, reply, "query")
+
+    events = [event async for event, _ in pipeline.run_pipeline_stream(QUERY)]
+    assert events[-1] == "final", f"stream: ended with {events[-1]!r} for {reply!r}"
+
+    for result in await pipeline.run_pipeline_batch([QUERY, QUERY.replace("Pune", "Mumbai")]):
+        check_result(result, rule, reply, "batch")
+
+
+async def main():
+    async def no_chunks(query, k=5, **kwargs):
+        return []
+
+    async def no_chunks_batch(queries, k=5, **kwargs):
+        return [[] for _ in queries]
+
+    pipeline.search_chunks_async = no_chunks
+    pipeline.search_chunks_batch_async = no_chunks_batch
+    pipeline.lookup_clauses = lambda clause_ids, per_clause=1, **kwargs: {}
+
+    with open(GARBLED_PATH, "r", encoding="utf-8") as f:
+        replies = json.load(f)
+    for reply in replies:
+        await check_reply(reply)
+    print(f"✅ {len(replies)} garbled LLM decisions -> rule-based decision kept on /query, stream and batch")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
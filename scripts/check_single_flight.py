@@ -0,0 +1,101 @@
+# scripts/check_single_flight.py
+"""
+Checks that concurrent duplicate requests are coalesced: N identical
+call_phi3_async calls must reach Ollama once, and N identical claims through
+run_pipeline_async must cost the same LLM calls as a single claim.
+
+Runs against an in-process fake Ollama client, so no model is needed.
+
+    python -m scripts.check_single_flight
+"""
+import asyncio
+import os
+
+# Measure coalescing alone, not the response cache
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+import backend.llm as llm  # noqa: E402
+import backend.pipeline as pipeline  # noqa: E402
+
+CONCURRENCY = 20
+GENERATION_DELAY = 0.2
+DECISION = '{"decision": "approved", "amount": "Up to Sum Insured", "justification": "Covered", "clauses_used": []}'
+
+
+class FakeStream:
+    def __init__(self, text: str):
+        self._pieces = iter(text)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            piece = next(self._pieces)
+        except StopIteration:
+            raise StopAsyncIteration
+        return {"response": piece, "done": False}
+
+    async def aclose(self):
+        pass
+
+
+class CountingClient:
+    """Stands in for ollama.AsyncClient and counts generate() calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def list(self):
+        return {"models": []}
+
+    async def generate(self, model, prompt, options=None, stream=False, keep_alive=None):
+        self.calls += 1
+        await asyncio.sleep(GENERATION_DELAY)
+        if stream:
+            return FakeStream(DECISION)
+        return {"response": DECISION}
+
+
+async def check_llm_calls(client: CountingClient):
+    client.calls = 0
+    prompt = "Return JSON for: 45-year-old male, knee surgery in Pune"
+    results = await asyncio.gather(*(llm.call_phi3_async(prompt) for _ in range(CONCURRENCY)))
+    assert all(r == results[0] for r in results), "coalesced callers saw different results"
+    assert client.calls == 1, f"expected 1 generation, got {client.calls}"
+    print(f"✅ {CONCURRENCY} identical LLM prompts -> {client.calls} generation")
+
+
+async def check_pipeline_calls(client: CountingClient):
+    # Free-form query so the extraction LLM call is exercised too
+    query = "My father (68) had a heart bypass, bought the policy 14 months ago"
+
+    client.calls = 0
+    await pipeline.run_pipeline_async(query)
+    single = client.calls
+
+    client.calls = 0
+    variants = [query, query.upper(), f"  {query}  "]
+    results = await asyncio.gather(*(pipeline.run_pipeline_async(variants[i % len(variants)])
+                                     for i in range(CONCURRENCY)))
+    assert all(r == results[0] for r in results), "coalesced claims saw different results"
+    assert client.calls == single, f"expected {single} LLM calls, got {client.calls}"
+    print(f"✅ {CONCURRENCY} duplicate claims -> {client.calls} LLM calls (single claim: {single})")
+
+
+async def main():
+    client = CountingClient()
+    llm.get_async_client = lambda: client
+    async def no_chunks(query, k=5, **kwargs):
+        return []
+
+    pipeline.search_chunks_async = no_chunks
+    pipeline.lookup_clauses = lambda clause_ids, per_clause=1, **kwargs: {}
+
+    await check_llm_calls(client)
+    await check_pipeline_calls(client)
+    print(f"📊 single-flight stats: pipeline {pipeline.pipeline_flight.stats()}, llm {llm.llm_flight.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+# scripts/check_tenant_residency.py
+"""
+Check that tenant namespaces stay isolated and that memory follows the
+number of resident tenants, not the number of tenants on disk.
+
+Synthetic tenants (random vectors, no embedder or PDFs needed) are written
+to a temporary directory, then queried round-robin with a small residency
+bound. Every hit must come from the queried tenant's own document, at most
+--max-resident tenant indexes may be held at once, and process RSS should
+level off once that many are loaded.
+
+    python -m scripts.check_tenant_residency --tenants 24 --chunks 20000 --max-resident 4
+"""
+import argparse
+import resource
+import tempfile
+
+import numpy as np
+
+from backend import tenants
+from backend.ann_index import build_index, index_params
+from backend.document_processor import assign_chunk_ids
+from backend.tenants import TenantPaths
+from backend.vector_store import holder_for, tenant_indexes, write_index_generation
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak, where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_tenant(tenant: str, n: int, dim: int, rng) -> str:
+    doc_id = f"policy-{tenant}"
+    chunks = assign_chunk_ids(doc_id, [{"text": f"{tenant} clause {i}", "clause_id": "general"} for i in range(n)])
+    vectors = rng.standard_normal((n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    params = index_params(n, dim, index_type="flat", storage="float32")
+    index = build_index(vectors, np.array([c["chunk_id"] for c in chunks], dtype="int64"), params)
+    write_index_generation(index, ((c["chunk_id"], c) for c in chunks), TenantPaths(tenant).index_dir, params)
+    return doc_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tenants", type=int, default=24)
+    parser.add_argument("--chunks", type=int, default=20000, help="vectors per tenant")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--max-resident", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        tenants.TENANTS_DIR = tmp
+        tenant_indexes.max_resident = args.max_resident
+        names = [f"tenant-{i:03d}" for i in range(args.tenants)]
+        doc_ids = {t: write_tenant(t, args.chunks, args.dim, rng) for t in names}
+        index_mb = args.chunks * args.dim * 4 / 2 ** 20
+        print(f"📦 Wrote {args.tenants} tenants × {args.chunks:,} vectors ({index_mb:.0f} MB of vectors each)")
+
+        baseline = rss_mb()
+        failures = 0
+        peak_resident = 0
+        for round_no in range(args.rounds):
+            for position, tenant in enumerate(names):
+                query = rng.standard_normal((1, args.dim)).astype("float32")
+                hits = holder_for(tenant).search_vectors(query, k=5)[0]
+                failures += sum(1 for hit in hits if hit["doc_id"] != doc_ids[tenant])
+                peak_resident = max(peak_resident, len(tenant_indexes.stats()["resident"]))
+                if round_no == 0 and (position + 1) in (1, args.max_resident, args.tenants):
+                    print(f"  {position + 1:>3} tenants queried | resident {len(tenant_indexes.stats()['resident'])} "
+                          f"| RSS +{rss_mb() - baseline:7.1f} MB")
+        stats = tenant_indexes.stats()
+        print(f"  after {args.rounds} rounds    | resident {len(stats['resident'])} | RSS +{rss_mb() - baseline:7.1f} MB "
+              f"| {stats['loads']} loads, {stats['evictions']} evictions")
+
+    ok = failures == 0 and peak_resident <= args.max_resident
+    if failures:
+        print(f"❌ {failures} hits came from another tenant's documents")
+    if peak_resident > args.max_resident:
+        print(f"❌ {peak_resident} tenant indexes were resident at once (bound {args.max_resident})")
+    if ok:
+        print(f"✅ Tenants isolated; at most {peak_resident} of {args.tenants} tenant indexes resident")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# scripts/check_worker_memory.py
+"""
+Check that uvicorn-style worker processes share one copy of the index.
+
+A synthetic index generation (random vectors, no embedder needed) is written
+to a temporary directory. Then 1, 2, 4, ... worker processes open it the way
+the API does (IndexHolder) and search it until every page has been touched.
+All workers are measured while alive together. Reported per worker:
+  private  anonymous RSS, the memory only that worker uses
+  index    private memory added by opening and searching the index
+  rss      resident set including shared file pages (counted in every worker)
+  pss      proportional share: shared pages are divided among their users
+With FAISS_MMAP=1, the index's private memory should stay well below its size
+and flat as workers are added, and total PSS should grow by much less than one index per worker.
+Run with --no-mmap to see the private-copy baseline. Linux only (/proc).
+
+    python -m scripts.check_worker_memory --vectors 200000 --workers 1,2,4
+    python -m scripts.check_worker_memory --index-type ivf_flat --vectors 50000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+
+def memory_mb() -> dict:
+    fields = {}
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) / 1024
+    pss = 0.0
+    try:
+        with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return {"private": fields.get("RssAnon", 0.0), "rss": fields.get("VmRSS", 0.0), "pss": pss}
+
+
+def _worker(index_dir: str, dim: int, queries: int, start, done, results):
+    from backend.vector_store import IndexHolder
+
+    before = memory_mb()["private"]
+    holder = IndexHolder(index_dir)
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(queries):
+        holder.search_vectors(rng.standard_normal((8, dim)).astype("float32"), k=5)
+    start.wait()  # every worker is loaded and alive
+    sample = memory_mb()
+    sample["index"] = sample["private"] - before
+    results.put(sample)
+    done.wait()  # stay alive until all have measured, so shared pages stay shared
+
+
+def measure(index_dir: str, workers: int, dim: int, queries: int):
+    context = multiprocessing.get_context("spawn")
+    start, done = context.Barrier(workers), context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(index_dir, dim, queries, start, done, results))
+                 for _ in range(workers)]
+    for p in processes:
+        p.start()
+    samples = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return samples
+
+
+def write_synthetic_index(index_dir: str, n: int, dim: int, index_type: str) -> float:
+    from backend.ann_index import build_index, index_params, min_vectors
+    from backend.document_processor import assign_chunk_ids
+    from backend.vector_store import write_index_generation
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = assign_chunk_ids("synthetic", [{"text": f"clause {i}", "clause_id": "general"} for i in range(n)])
+    params = index_params(n, dim, index_type=index_type, storage="float32")
+    if params["index_type"] != index_type:
+        raise SystemExit(f"❌ {n:,} vectors is too few to build {index_type} (needs {min_vectors(index_type):,})")
+    index = build_index(vectors, np.array([c["chunk_id"] for c in chunks], dtype="int64"), params)
+    write_index_generation(index, ((c["chunk_id"], c) for c in chunks), index_dir, params)
+    return n * dim * 4 / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--index-type", choices=("flat", "ivf_flat"), default="flat")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--queries", type=int, default=20, help="search batches per worker before measuring")
+    parser.add_argument("--no-mmap", action="store_true", help="read the index into each worker instead")
+    args = parser.parse_args()
+
+    # Spawned workers inherit the environment, and read FAISS_MMAP on import
+    os.environ["FAISS_MMAP"] = "0" if args.no_mmap else "1"
+    import faiss
+
+    if args.index_type == "flat" and not args.no_mmap and not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        print("⚠️ This FAISS version cannot map flat indexes (needs IO_FLAG_MMAP_IFC, FAISS 1.10+); "
+              "expect private copies, or use --index-type ivf_flat")
+
+    counts = [int(c) for c in args.workers.split(",")]
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_mb = write_synthetic_index(index_dir, args.vectors, args.dim, args.index_type)
+        mode = "private copies" if args.no_mmap else "memory-mapped"
+        print(f"📦 {args.vectors:,} × {args.dim} {args.index_type} index ({index_mb:.0f} MB of vectors), {mode}")
+        per_worker_private = []
+        for workers in counts:
+            samples = measure(index_dir, workers, args.dim, args.queries)
+            private = sum(s["private"] for s in samples) / workers
+            index_private = sum(s["index"] for s in samples) / workers
+            rss = sum(s["rss"] for s in samples) / workers
+            total_pss = sum(s["pss"] for s in samples)
+            per_worker_private.append(index_private)
+            print(f"  {workers:>2} workers | per worker: private {private:7.1f} MB  index {index_private:7.1f} MB  "
+                  f"rss {rss:7.1f} MB | total pss {total_pss:7.1f} MB")
+
+    if args.no_mmap:
+        return
+    growth = per_worker_private[-1] - per_worker_private[0]
+    if growth < 0.1 * index_mb and per_worker_private[-1] < 0.5 * index_mb:
+        print(f"✅ Private index memory per worker stays flat ({growth:+.1f} MB from {counts[0]} to {counts[-1]} workers); "
+              f"the index is shared through the page cache")
+    else:
+        print(f"❌ Workers hold private copies of the index ({per_worker_private[-1]:.0f} MB of index memory each)")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
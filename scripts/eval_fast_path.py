@@ -0,0 +1,117 @@
+# scripts/eval_fast_path.py
+"""
+Field accuracy of the rule-based fast path vs. the LLM extraction path.
+
+Every labelled query is parsed twice: once with the fast path allowed and
+once forcing the Phi-3 round-trip. Needs Ollama running for the LLM path:
+the script stops if MODEL_NAME can't be reached, and a query whose LLM parse
+failed (and fell back to the rules) is counted as not measured rather than
+scored as LLM output.
+
+    python -m scripts.eval_fast_path
+"""
+import asyncio
+import sys
+import time
+
+from backend.llm import MODEL_NAME, get_async_client
+from backend.pipeline import PARSE_STATS, extract_query_fields, parse_query_to_json
+
+FIELDS = ["age", "gender", "procedure", "location", "policy_duration_months"]
+
+LABELLED_QUERIES = [
+    ("46-year-old male, knee surgery in Pune, 3-month policy",
+     {"age": 46, "gender": "male", "procedure": "knee surgery", "location": "Pune", "policy_duration_months": 3}),
+    ("45-year-old male, knee surgery in Mumbai, 6-month policy",
+     {"age": 45, "gender": "male", "procedure": "knee surgery", "location": "Mumbai", "policy_duration_months": 6}),
+    ("60-year-old female, cataract surgery in Delhi, 2-year policy",
+     {"age": 60, "gender": "female", "procedure": "cataract surgery", "location": "Delhi", "policy_duration_months": 24}),
+    ("30-year-old male, emergency appendectomy in Chennai, 2 week policy",
+     {"age": 30, "gender": "male", "procedure": "appendectomy", "location": "Chennai", "policy_duration_months": 0}),
+    ("50-year-old female, angioplasty in Kolkata, 18 months policy",
+     {"age": 50, "gender": "female", "procedure": "angioplasty", "location": "Kolkata", "policy_duration_months": 18}),
+    ("72 year old woman needs cataract surgery in Jaipur, policy 5 years",
+     {"age": 72, "gender": "female", "procedure": "cataract surgery", "location": "Jaipur", "policy_duration_months": 60}),
+    ("Cataract surgery for 65-year-old woman, 2-year policy",
+     {"age": 65, "gender": "female", "procedure": "cataract surgery", "location": "unknown", "policy_duration_months": 24}),
+    ("Emergency appendectomy, 25-year-old, 1-week-old policy",
+     {"age": 25, "gender": "other", "procedure": "appendectomy", "location": "unknown", "policy_duration_months": 0}),
+    ("55-year-old diabetic, cataract surgery, 3-year policy",
+     {"age": 55, "gender": "other", "procedure": "cataract surgery", "location": "unknown", "policy_duration_months": 36}),
+    ("My father (68) had a heart bypass in Hyderabad, bought the policy 14 months ago",
+     {"age": 68, "gender": "male", "procedure": "heart bypass", "location": "Hyderabad", "policy_duration_months": 14}),
+]
+
+
+def field_hits(predicted: dict, expected: dict) -> dict:
+    hits = {}
+    for field in FIELDS:
+        got, want = predicted.get(field), expected[field]
+        if isinstance(want, str):
+            hits[field] = str(got or "").strip().lower() == want.lower()
+        else:
+            hits[field] = got == want
+    return hits
+
+
+def report(name: str, rows: list):
+    if not rows:
+        print(f"{name:<28} (no queries)")
+        return
+    per_field = {f: sum(r[f] for r in rows) / len(rows) for f in FIELDS}
+    overall = sum(per_field.values()) / len(FIELDS)
+    cells = "  ".join(f"{f.split('_')[0]} {v:5.0%}" for f, v in per_field.items())
+    print(f"{name:<28} n={len(rows):<3} overall {overall:5.0%} | {cells}")
+
+
+async def check_model() -> bool:
+    """Whether Ollama answers and has MODEL_NAME; otherwise every LLM parse would silently be the rules."""
+    try:
+        listing = await get_async_client().list()
+    except Exception as e:
+        print(f"❌ Ollama is not reachable ({e}); the LLM path can't be measured.")
+        return False
+    names = {name for m in listing.get("models", []) for name in (m.get("model"), m.get("name"))}
+    if MODEL_NAME not in names:
+        print(f"❌ {MODEL_NAME} is not pulled in Ollama; the LLM path can't be measured.")
+        return False
+    return True
+
+
+async def main():
+    if not await check_model():
+        sys.exit(1)
+
+    fast_rows, llm_rows_same, llm_rows_all = [], [], []
+    llm_seconds = 0.0
+    not_measured = 0
+
+    for query, expected in LABELLED_QUERIES:
+        fields, unresolved = extract_query_fields(query)
+        if not unresolved:
+            fast_rows.append(field_hits(fields, expected))
+
+        fallbacks = PARSE_STATS["llm_fallbacks"]
+        start = time.perf_counter()
+        llm_fields = await parse_query_to_json(query, use_fast_path=False)
+        llm_seconds += time.perf_counter() - start
+        if PARSE_STATS["llm_fallbacks"] > fallbacks:
+            not_measured += 1  # these fields came from the rules, not from Phi-3
+            continue
+
+        llm_rows_all.append(field_hits(llm_fields, expected))
+        if not unresolved:
+            llm_rows_same.append(llm_rows_all[-1])
+
+    total = len(LABELLED_QUERIES)
+    print(f"\n📊 Fast path taken for {len(fast_rows)}/{total} queries ({len(fast_rows) / total:.0%})")
+    report("fast path (rules only)", fast_rows)
+    report("LLM path, same queries", llm_rows_same)
+    report("LLM path, all queries", llm_rows_all)
+    if not_measured:
+        print(f"⚠️ LLM parse failed for {not_measured}/{total} queries; they are not measured in the LLM rows")
+    print(f"LLM extraction time: {llm_seconds / total:.2f}s per query (fast path: ~0s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+# scripts/load_test.py
+"""
+Concurrent /query load test against a running PolicyMind API.
+
+Fires the same mix of claims at increasing client concurrency and reports
+throughput and latency per level. With the async pipeline, throughput should
+rise with concurrency until the Ollama backend or MAX_CONCURRENT_QUERIES caps it.
+Past that, admission control answers the excess with 429 (counted as
+rejected) and goodput, the answers delivered within --deadline seconds, should
+hold at capacity instead of collapsing.
+
+    uvicorn backend.main:app --port 8000
+    python -m scripts.load_test --concurrency 1 2 4 8 16 --requests 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+SAMPLE_QUERIES = [
+    "45-year-old male, knee surgery in Mumbai, 6-month policy",
+    "60-year-old female, cataract surgery, 2-year policy",
+    "30-year-old male, emergency appendectomy, 2-week policy",
+    "50-year-old female, angioplasty in Pune, 18-month policy",
+]
+
+
+async def run_level(url: str, concurrency: int, total: int, timeout: float, deadline: float):
+    latencies, errors, rejected = [], 0, 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+
+    async def client_loop(client):
+        nonlocal errors, rejected
+        while not queue.empty():
+            query = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                r = await client.post(f"{url}/query", json={"query": query})
+                if r.status_code == 429:
+                    rejected += 1
+                    continue
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ok = len(latencies)
+    on_time = sum(1 for latency in latencies if latency <= deadline)
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    p95 = sorted(latencies)[int(0.95 * (ok - 1))] if latencies else float("nan")
+    print(f"clients {concurrency:>3} | {ok:>4} ok {rejected:>3} 429 {errors:>3} err | "
+          f"{ok / elapsed:6.2f} req/s, goodput {on_time / elapsed:6.2f} req/s | p50 {p50:6.2f}s  p95 {p95:6.2f}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--deadline", type=float, default=30.0, help="seconds an answer is still useful (Streamlit's timeout)")
+    args = parser.parse_args()
+
+    print(f"🚦 Load testing {args.url}/query")
+    for concurrency in args.concurrency:
+        await run_level(args.url, concurrency, args.requests, args.timeout, args.deadline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+# scripts/report_compression.py
+"""
+Memory/recall report for compressed vector storage (FAISS_STORAGE).
+
+For each storage mode the index is built as build_faiss_index would build
+it, then compared with exact float32 brute-force search: serialized index
+size (what each API worker keeps resident), recall@k, and the share of
+queries whose top-k clause set is identical, with and without exact
+re-ranking.
+
+    python -m scripts.report_compression                  # synthetic corpus
+    python -m scripts.report_compression --sizes 100000 1000000 --types flat hnsw
+    python -m scripts.report_compression --chunk-store    # real chunks in data/chunks
+"""
+import argparse
+
+import faiss
+import numpy as np
+
+from backend.ann_index import INDEX_TYPES, RERANK, STORAGE_CODECS, build_index, index_params, rerank
+from scripts.bench_ann import make_corpus, recall_at_k
+
+
+def same_clauses(found: np.ndarray, truth: np.ndarray) -> float:
+    """Share of queries that retrieve exactly the same top-k chunks as exact search."""
+    return float(np.mean([set(f) == set(t) for f, t in zip(found, truth)]))
+
+
+def exact_lookup(corpus):
+    return lambda ids: (corpus[ids], np.ones(len(ids), dtype=bool))
+
+
+def report(corpus, query_vecs, index_types, k: int, rerank_factor: int):
+    ids = np.arange(len(corpus), dtype="int64")
+    exact = faiss.IndexFlatL2(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(query_vecs, k)
+    del exact
+    print(f"{'index':<26}{'MB':>9}{'x smaller':>11}{'recall@k':>10}{'same top-k':>12}"
+          f"{'+rerank':>9}{'same':>7}")
+
+    for index_type in index_types:
+        baseline_bytes = None
+        # IVF-PQ has its own codec, FAISS_STORAGE doesn't apply
+        for storage in ["float32"] if index_type == "ivf_pq" else STORAGE_CODECS:
+            params = index_params(len(corpus), corpus.shape[1], index_type, storage)
+            if params["index_type"] != index_type:
+                print(f"{index_type:<26}  skipped: corpus is below its minimum size")
+                break
+            index = build_index(corpus, ids, params)
+            size = len(faiss.serialize_index(index))
+            baseline_bytes = baseline_bytes or size
+
+            _, found = index.search(query_vecs, k)
+            line = (f"{params['factory']:<26}{size / 2**20:>9.1f}{baseline_bytes / size:>11.1f}"
+                    f"{recall_at_k(found, truth):>10.3f}{same_clauses(found, truth):>12.1%}")
+            if params["storage"] != "float32" and rerank_factor > 1:
+                distances, candidates = index.search(query_vecs, k * rerank_factor)
+                _, reranked = rerank(query_vecs, distances, candidates, exact_lookup(corpus), k)
+                line += f"{recall_at_k(reranked, truth):>9.3f}{same_clauses(reranked, truth):>7.0%}"
+            print(line)
+            del index
+
+
+def chunk_store_corpus(queries: int):
+    from backend.document_processor import load_all_chunks
+    from backend.vector_store import encode_chunks, get_embedder
+    from scripts.eval_fast_path import LABELLED_QUERIES
+
+    chunks = load_all_chunks()
+    if not chunks:
+        raise SystemExit("❌ No documents in the chunk store; upload some PDFs first")
+    corpus = encode_chunks([c["text"] for c in chunks])
+    texts = [q for q, _ in LABELLED_QUERIES]
+    # Pad with chunk texts so small query sets still give a stable estimate
+    texts += [c["text"] for c in chunks[:max(0, queries - len(texts))]]
+    return corpus, np.asarray(get_embedder().encode(texts), dtype="float32")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--types", nargs="+", default=["flat"], choices=INDEX_TYPES)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--rerank", type=int, default=RERANK, help="candidate multiplier for re-ranking")
+    parser.add_argument("--chunk-store", action="store_true", help="use the real chunks in data/chunks")
+    args = parser.parse_args()
+
+    if args.chunk_store:
+        corpus, query_vecs = chunk_store_corpus(args.queries)
+        print(f"\n📊 Chunk store: {len(corpus):,} chunks, {len(query_vecs)} queries, k={args.k}")
+        report(corpus, query_vecs, args.types, args.k, args.rerank)
+        return
+
+    for n in args.sizes:
+        corpus, query_vecs = make_corpus(n, args.queries)
+        print(f"\n📊 Synthetic: {n:,} chunks, {args.queries} queries, k={args.k}")
+        report(corpus, query_vecs, args.types, args.k, args.rerank)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,14 @@
 import streamlit as st
 import requests
 import json
+import time
 from datetime import datetime
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Give up polling an upload's indexing job after this many seconds
+UPLOAD_POLL_TIMEOUT = 600
+
 st.set_page_config(page_title="PolicyMind", layout="wide", page_icon="🧠")
 st.title("🧠 PolicyMind v2.1")
 st.caption("AI-Powered Insurance Policy Analysis Engine with Natural Language Responses")
@@ -16,6 +20,25 @@ if 'processing_history' not in st.session_state:
 if 'current_result' not in st.session_state:
     st.session_state.current_result = None
 
+def stream_query_events(query):
+    """Yield (event, data) pairs from the /query/stream Server-Sent Events endpoint."""
+    with requests.post(
+        "http://localhost:8000/query/stream",
+        json={"query": query},
+        stream=True,
+        timeout=(5, 60)
+    ) as response:
+        response.raise_for_status()
+        event, data_lines = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+            elif not line and data_lines:
+                yield event, json.loads("\n".join(data_lines))
+                event, data_lines = "message", []
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -126,9 +149,22 @@ with tab2:
             try:
                 files = {"file": (uploaded.name, uploaded.getvalue(), "application/pdf")}
                 r = requests.post("http://localhost:8000/upload/", files=files)
-                if r.status_code == 200:
-                    st.success("✅ Document uploaded and indexed successfully!")
-                    
+                if r.status_code == 200 and r.json().get("job_id"):
+                    # Indexing runs in the background; poll the job until it finishes
+                    job = r.json()["job"]
+                    deadline = time.monotonic() + UPLOAD_POLL_TIMEOUT
+                    while job.get("status") in ("queued", "parsing", "indexing") and time.monotonic() < deadline:
+                        time.sleep(1)
+                        job = requests.get(f"http://localhost:8000/jobs/{job['job_id']}", timeout=10).json()
+                    if job.get("status") in ("queued", "parsing", "indexing"):
+                        st.warning(f"⏳ Still {job['status']} after {UPLOAD_POLL_TIMEOUT // 60} minutes; "
+                                   f"check job {job['job_id']} later.")
+                    elif job.get("status") == "done":
+                        st.success(f"✅ Document uploaded and indexed successfully! ({job.get('chunks')} clauses)")
+                    elif job.get("status") == "duplicate":
+                        st.info(f"ℹ️ {job.get('message')}")
+                    else:
+                        st.error(f"❌ Indexing failed: {job.get('message')}")
                 else:
                     st.error(f"❌ Upload failed: {r.text}")
             except Exception as e:
@@ -159,14 +195,30 @@ with tab2:
         else:
             with st.spinner("🧠 AI is analyzing your query..."):
                 try:
-                    response = requests.post(
-                        "http://localhost:8000/query",
-                        json={"query": user_query},
-                        timeout=30
-                    )
+                    # Render each pipeline stage as soon as the backend emits it
+                    status = st.empty()
+                    preview = st.empty()
+                    result = None
+                    for event, data in stream_query_events(user_query):
+                        if event == "parsed":
+                            status.info(f"🔍 Understood: {data.get('procedure')}, age {data.get('age', 'N/A')}, "
+                                        f"{data.get('policy_duration_months', 0)}-month policy")
+                        elif event == "clauses":
+                            status.info(f"📚 Found {len(data)} relevant policy clauses, deciding...")
+                        elif event == "rule_decision":
+                            preview.markdown(f'<div class="nlp-response">{data["user_friendly_response"]}</div>', unsafe_allow_html=True)
+                            status.info("🧠 Preliminary decision ready, AI is refining the justification...")
+                        elif event == "llm_justification":
+                            status.info("✍️ Justification refined, finishing up...")
+                        elif event in ("final", "error"):
+                            result = data
+                    status.empty()
 
-                    if response.status_code == 200:
-                        result = response.json()
+                    if result is not None and "retry_after" in result:
+                        preview.empty()
+                        st.warning(f"⏳ The AI engine is at capacity. Please try again in {result['retry_after']} seconds.")
+                    elif result is not None:
+                        preview.markdown(f'<div class="nlp-response">{result.get("user_friendly_response", "")}</div>', unsafe_allow_html=True)
                         st.session_state.current_result = result
                         st.session_state.processing_history.append({
                             "query": user_query,
@@ -176,8 +228,15 @@ with tab2:
                         st.success("✅ Analysis complete! Check the AI Response tab.")
                         #removed BALLOONS 
                     else:
-                        st.error(f"❌ API Error: {response.status_code}")
-                        st.json(response.text)
+                        st.error("❌ API Error: stream ended without a result")
+
+                except requests.HTTPError as e:
+                    if e.response.status_code == 429:
+                        retry_after = e.response.headers.get("Retry-After", "a few")
+                        st.warning(f"⏳ The AI engine is at capacity. Please try again in {retry_after} seconds.")
+                    else:
+                        st.error(f"❌ API Error: {e.response.status_code}")
+                        st.json(e.response.text)
 
                 except requests.ConnectionError:
                     st.warning("⚠️ Backend is offline. Showing mock response for demo.")
@@ -304,6 +363,8 @@ with tab4:
             for i, j in enumerate(justifications, 1):
                 with st.expander(f"📄 Clause {i}: {j.get('clause', 'General')}"):
                     st.write(f"**Reasoning:** {j['match_reason']}")
+                    if j.get("clause_text"):
+                        st.caption(j["clause_text"])
                     score = j.get("relevance_score", 0.8)
                     st.progress(score, text=f"Relevance: {score:.1%}")
         else: